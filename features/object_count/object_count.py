@@ -1,34 +1,78 @@
-import cv2
+import os
+import json
 import torch
 import numpy as np
-from collections import deque
+from collections import defaultdict
+from lib.annotator import Annotator
+from lib.tracker import KalmanTracker
+from features.object_count.zones import CountingLine, CountingZone, line_crossings, points_in_polygon, load_zone_config
+from lib.model_registry import registry, verify_checksum
+
+# YOLOv5s local: pesos, su suma SHA-256 y el código del modelo (checkout fijo de ultralytics/yolov5)
+YOLOV5_WEIGHTS = 'assets/models/yolov5s.pt'
+YOLOV5_CHECKSUM = 'assets/models/yolov5s.pt.sha256'
+YOLOV5_REPO_DIR = os.environ.get('YOLOV5_REPO_DIR', 'assets/models/yolov5')
+
+
+def load_yolov5():
+    """Cargar YOLOv5s desde archivos locales, sin acceso a red"""
+    if not os.path.exists(YOLOV5_WEIGHTS):
+        raise FileNotFoundError(f"Pesos de YOLOv5 no encontrados: {YOLOV5_WEIGHTS}")
+    if not os.path.exists(os.path.join(YOLOV5_REPO_DIR, 'hubconf.py')):
+        raise FileNotFoundError(f"Código de YOLOv5 no encontrado: {YOLOV5_REPO_DIR}")
+
+    verify_checksum(YOLOV5_WEIGHTS, YOLOV5_CHECKSUM)
+
+    # Evitar que YOLOv5 intente instalar dependencias faltantes (requiere red)
+    os.environ.setdefault('YOLOv5_AUTOINSTALL', 'False')
+
+    return torch.hub.load(YOLOV5_REPO_DIR, 'custom', path=YOLOV5_WEIGHTS,
+                          source='local', _verbose=False)
+
+
+registry.register('yolov5s', load_yolov5)
 
 
 class ObjectCount:
-    """Contador de vehículos mejorado con tracking simple"""
+    """Contador de vehículos con tracking por filtro de Kalman"""
 
     def __init__(self):
         super().__init__()
-        self.model = torch.hub.load('ultralytics/yolov5', 'yolov5s', pretrained=True)
+        # Modelo compartido: se carga una sola vez por proceso
+        self.model = registry.get('yolov5s')
 
-        # Sistema de tracking
-        self.next_object_id = 0
-        self.tracked_objects = {}
+        # Tracking con velocidad (estado de Kalman en columnas NumPy con posiciones reutilizables)
+        self.tracker = KalmanTracker(max_distance=80, max_disappeared=40)
+        self.tracks = self.tracker.tracks
         self.count_detection = 0
 
         # Parámetros
-        self.max_disappeared = 40
-        self.max_distance = 80
         self.min_confidence = 0.65
 
+        # Detección cada k frames: entre detecciones los tracks avanzan con la velocidad del filtro.
+        # k se adapta a la cantidad de objetos: max_stride con tráfico ralo (<= sparse_tracks),
+        # 1 con tráfico denso (>= dense_tracks). max_stride = 1 detecta en todos los frames.
+        self.max_stride = 1
+        self.sparse_tracks = 3
+        self.dense_tracks = 12
+        self.detected_frames = 0
+        self.predicted_frames = 0
+
         # Vehículos a detectar
         self.vehicle_classes = ['car', 'truck', 'bus', 'motorcycle', 'person', 'bicycle', 'cat', 'dog']
 
         # Conteo por línea
-        self.counted_ids = set()
+        self.new_counts = []  # Objetos contados en el último frame
         self.counting_line_y = None
         self.line_position = 0.55  # Posición por defecto: 55% del frame
 
+        # Líneas y zonas de conteo: la línea horizontal por defecto más las configuradas
+        self.default_line = None
+        self.default_line_enabled = True
+        self.lines = []
+        self.zones = []
+        self.zone_config_path = None
+
         # Contador por tipo de objeto
         self.object_type_counters = {}  # {'car': 1, 'person': 1, ...}
 
@@ -43,207 +87,377 @@ class ObjectCount:
             'cat': 'Gato',
             'dog': 'Perro'
         }
-        
-    def set_counting_line(self, frame_height, position=0.5):
+
+        # Máscara de clases del modelo a detectar (ids precalculados)
+        names = self.model.names
+        if not isinstance(names, dict):
+            names = dict(enumerate(names))
+        self.model_class_names = [names.get(i, str(i)) for i in range(max(names) + 1)]
+        self.vehicle_class_ids = [i for i, name in enumerate(self.model_class_names)
+                                  if name in self.vehicle_classes]
+        self.vehicle_class_mask = np.zeros(len(self.model_class_names), dtype=bool)
+        self.vehicle_class_mask[self.vehicle_class_ids] = True
+
+        # Dibujo (se puede desactivar cuando nadie consume el frame)
+        self.annotator = Annotator()
+
+    def set_counting_line(self, frame_height, position=0.5, frame_width=None):
         """Establecer línea de conteo"""
         self.counting_line_y = int(frame_height * position)
-        
-    def euclidean_distance(self, point1, point2):
-        """Calcular distancia euclidiana entre dos puntos"""
-        return np.sqrt((point1[0] - point2[0])**2 + (point1[1] - point2[1])**2)
-        
-    def register_object(self, centroid, bbox, class_name):
-        """Registrar nuevo objeto"""
-        # Incrementar contador para este tipo de objeto
-        if class_name not in self.object_type_counters:
-            self.object_type_counters[class_name] = 0
-
-        self.object_type_counters[class_name] += 1
-        object_type_id = self.object_type_counters[class_name]
-
-        # Obtener nombre en español
-        display_name = self.class_names_es.get(class_name, class_name.capitalize())
-
-        self.tracked_objects[self.next_object_id] = {
-            'centroid': centroid,
-            'bbox': bbox,
-            'disappeared': 0,
-            'prev_centroid': centroid,
-            'class_name': class_name,
-            'display_name': f"{display_name} {object_type_id}"
-        }
-        self.next_object_id += 1
-        
-    def deregister_object(self, object_id):
-        """Eliminar objeto"""
-        if object_id in self.tracked_objects:
-            del self.tracked_objects[object_id]
-        
+        if frame_width is None:
+            frame_width = self.default_line.p2[0] if self.default_line else frame_height * 16 // 9
+
+        # La línea por defecto cuenta de arriba hacia abajo; al moverla se conservan sus conteos
+        p1, p2 = (0, self.counting_line_y), (frame_width, self.counting_line_y)
+        if self.default_line is None:
+            self.default_line = CountingLine("LINEA DE CONTEO", p1, p2, CountingLine.POSITIVE)
+        else:
+            self.default_line.p1 = (0.0, float(self.counting_line_y))
+            self.default_line.p2 = (float(frame_width), float(self.counting_line_y))
+
+    def add_line(self, name, p1, p2, direction=CountingLine.POSITIVE):
+        """Agregar línea de conteo (segmento con dirección)"""
+        if len(self.lines) >= 62:
+            raise ValueError("Máximo 62 líneas de conteo por stream")
+        line = CountingLine(name, p1, p2, direction)
+        self.lines.append(line)
+        return line
+
+    def add_zone(self, name, polygon):
+        """Agregar zona poligonal"""
+        if len(self.zones) >= 63:
+            raise ValueError("Máximo 63 zonas por stream")
+        zone = CountingZone(name, polygon)
+        self.zones.append(zone)
+        return zone
+
+    def load_zones(self, path):
+        """Cargar líneas y zonas desde JSON (se aplican con el primer frame)"""
+        self.zone_config_path = path
+
+    def _apply_zone_config(self, frame):
+        height, width = frame.shape[:2]
+        lines, zones = load_zone_config(self.zone_config_path, frame_size=(width, height))
+        for line in lines:
+            self.add_line(line.name, line.p1, line.p2, line.direction)
+        for zone in zones:
+            self.add_zone(zone.name, zone.polygon)
+        self.zone_config_path = None
+
+    def all_lines(self):
+        """Líneas activas (la línea por defecto primero)"""
+        if self.default_line_enabled and self.default_line is not None:
+            return [self.default_line] + self.lines
+        return list(self.lines)
+
+    def class_name(self, class_id):
+        """Nombre de clase del modelo"""
+        return self.model_class_names[class_id]
+
+    def display_name(self, slot):
+        """Nombre para mostrar del track (ej: "Auto 1", "Persona 3")"""
+        class_name = self.model_class_names[self.tracks.class_id[slot]]
+        name = self.class_names_es.get(class_name, class_name.capitalize())
+        return f"{name} {self.tracks.type_number[slot]}"
+
+    def register_objects(self, slots):
+        """Numerar los objetos nuevos por tipo (ej: "Auto 3")"""
+        for slot in slots.tolist():
+            class_name = self.model_class_names[self.tracks.class_id[slot]]
+            self.object_type_counters[class_name] = self.object_type_counters.get(class_name, 0) + 1
+            self.tracks.type_number[slot] = self.object_type_counters[class_name]
+
     def update_tracking(self, detections):
-        """Actualizar tracking con Hungarian algorithm simplificado"""
+        """Emparejar detecciones con las posiciones previstas (húngaro por clase) y corregir el filtro.
 
-        # Si no hay objetos trackeados, registrar todos
-        if len(self.tracked_objects) == 0:
-            for centroid, bbox, class_name in detections:
-                self.register_object(centroid, bbox, class_name)
-            return
-            
-        # Si no hay nuevas detecciones
-        if len(detections) == 0:
-            for object_id in list(self.tracked_objects.keys()):
-                self.tracked_objects[object_id]['disappeared'] += 1
-                if self.tracked_objects[object_id]['disappeared'] > self.max_disappeared:
-                    self.deregister_object(object_id)
+        detections: (centroides Nx2, cajas Nx4, ids de clase N)
+        """
+        centroids, boxes, class_ids = detections
+        _, new_slots = self.tracker.update(centroids, boxes, class_ids)
+        self.register_objects(new_slots)
+
+    def current_stride(self):
+        """Frames entre detecciones según la densidad de tráfico"""
+        if self.max_stride <= 1:
+            return 1
+        visible = len(self.tracker.visible_slots())
+        if visible <= self.sparse_tracks:
+            return self.max_stride
+        if visible >= self.dense_tracks:
+            return 1
+        ratio = (self.dense_tracks - visible) / (self.dense_tracks - self.sparse_tracks)
+        return max(1, int(round(1 + ratio * (self.max_stride - 1))))
+
+    def should_detect(self):
+        """¿Toca inferencia en el próximo frame?"""
+        return self.detection_plan(1)[0]
+
+    def detection_plan(self, frames):
+        """Cuáles de los próximos frames llevan inferencia, con el intervalo actual"""
+        stride = self.current_stride()
+        elapsed = self.tracker.frame_index - self.tracker.last_update_frame
+        first = self.detected_frames == 0
+        plan = []
+        for _ in range(frames):
+            elapsed += 1
+            due = first or elapsed >= stride
+            if due:
+                elapsed = 0
+                first = False
+            plan.append(due)
+        return plan
+
+    def check_line_crossings(self):
+        """Contar los cruces de todos los objetos con todas las líneas a la vez"""
+        lines = self.all_lines()
+        tracks = self.tracks
+        slots = tracks.active_slots()
+        if not lines or len(slots) == 0:
+            return []
+
+        p1 = np.array([line.p1 for line in lines], dtype=np.float32)
+        p2 = np.array([line.p2 for line in lines], dtype=np.float32)
+        crossings = line_crossings(tracks.prev_centroid[slots], tracks.centroid[slots], p1, p2)
+
+        allow_positive = np.array([line.counts_direction(CountingLine.POSITIVE) for line in lines])
+        allow_negative = np.array([line.counts_direction(CountingLine.NEGATIVE) for line in lines])
+        bits = np.left_shift(np.int64(1), np.arange(len(lines), dtype=np.int64))
+        already = (tracks.counted_lines[slots, None] & bits[None, :]) != 0
+
+        new = (((crossings > 0) & allow_positive) | ((crossings < 0) & allow_negative)) & ~already
+        rows, cols = np.nonzero(new)
+
+        for row, col in zip(rows.tolist(), cols.tolist()):
+            slot = slots[row]
+            line = lines[col]
+            direction = CountingLine.POSITIVE if crossings[row, col] > 0 else CountingLine.NEGATIVE
+            line.add(direction)
+            tracks.counted_lines[slot] |= bits[col]
+
+            # El total cuenta cada objeto una sola vez, aunque cruce varias líneas
+            first = not tracks.counted[slot]
+            if first:
+                tracks.counted[slot] = True
+                self.count_detection += 1
+
+            object_id = int(tracks.object_id[slot])
+            self.new_counts.append({
+                'object_id': object_id,
+                'class_name': self.class_name(tracks.class_id[slot]),
+                'display_name': self.display_name(slot),
+                'bbox': tuple(tracks.bbox[slot].tolist()),
+                'line': line.name,
+                'direction': direction,
+                'first': first  # Primer cruce del objeto: el que se registra como vehículo
+            })
+            print(f"✅ Vehículo {object_id} contado en '{line.name}'! Total: {self.count_detection}")
+
+        return slots[rows]
+
+    def update_zones(self):
+        """Ocupación y entradas de todas las zonas (todos los objetos a la vez por zona)"""
+        if not self.zones:
             return
-        
-        # Matching simple: para cada objeto trackeado, encontrar la detección más cercana
-        object_ids = list(self.tracked_objects.keys())
-        used_detections = set()
-        
-        # Ordenar objetos por menor desaparición (más confiables primero)
-        object_ids.sort(key=lambda oid: self.tracked_objects[oid]['disappeared'])
-        
-        for object_id in object_ids:
-            obj_centroid = self.tracked_objects[object_id]['centroid']
-            obj_class = self.tracked_objects[object_id]['class_name']
-
-            # Encontrar detección más cercana no usada DE LA MISMA CLASE
-            min_distance = float('inf')
-            best_match = None
-
-            for idx, (det_centroid, det_bbox, det_class) in enumerate(detections):
-                if idx in used_detections:
-                    continue
-
-                # Solo emparejar objetos de la misma clase
-                if det_class != obj_class:
-                    continue
-
-                distance = self.euclidean_distance(obj_centroid, det_centroid)
-
-                if distance < min_distance and distance < self.max_distance:
-                    min_distance = distance
-                    best_match = idx
-
-            # Si encontramos un match
-            if best_match is not None:
-                self.tracked_objects[object_id]['prev_centroid'] = self.tracked_objects[object_id]['centroid']
-                self.tracked_objects[object_id]['centroid'] = detections[best_match][0]
-                self.tracked_objects[object_id]['bbox'] = detections[best_match][1]
-                self.tracked_objects[object_id]['disappeared'] = 0
-                used_detections.add(best_match)
-            else:
-                # No encontró match, incrementar desaparición
-                self.tracked_objects[object_id]['disappeared'] += 1
-                if self.tracked_objects[object_id]['disappeared'] > self.max_disappeared:
-                    self.deregister_object(object_id)
-
-        # Registrar detecciones no matcheadas como nuevos objetos
-        for idx, (centroid, bbox, class_name) in enumerate(detections):
-            if idx not in used_detections:
-                self.register_object(centroid, bbox, class_name)
-                
-    def check_line_crossing(self, object_id):
-        """Verificar si cruzó la línea"""
-        if self.counting_line_y is None:
-            return False
-            
-        if object_id in self.counted_ids:
-            return False
-            
-        if object_id not in self.tracked_objects:
-            return False
-            
-        obj = self.tracked_objects[object_id]
-        prev_y = obj['prev_centroid'][1]
-        curr_y = obj['centroid'][1]
-        
-        # Cruzó de arriba hacia abajo
-        if prev_y < self.counting_line_y <= curr_y:
-            self.counted_ids.add(object_id)
-            self.count_detection += 1
-            print(f"✅ Vehículo {object_id} contado! Total: {self.count_detection}")
-            return True
-            
-        return False
-        
-    def get_bboxes(self, prediction):
-        """Obtener detecciones"""
-        df = prediction.pandas().xyxy[0]
-        df = df[df["confidence"] >= self.min_confidence]
-        df = df[df["name"].isin(self.vehicle_classes)]
-
-        detections = []
-        for _, row in df.iterrows():
-            bbox = [int(row['xmin']), int(row['ymin']), int(row['xmax']), int(row['ymax'])]
-            centroid = self.get_center(bbox)
-            class_name = row['name']
-            detections.append((centroid, bbox, class_name))
 
-        return detections
-        
-    @staticmethod
-    def get_center(bbox):
-        """Calcular centroide"""
-        center_x = (bbox[0] + bbox[2]) // 2
-        center_y = (bbox[1] + bbox[3]) // 2
-        return (center_x, center_y)
-        
-    def start_detector_no_text(self, frame):
-        """Detectar sin texto en frame"""
+        tracks = self.tracks
+        slots = tracks.active_slots()
+        points = tracks.centroid[slots]
+        visible = tracks.disappeared[slots] == 0
+
+        for index, zone in enumerate(self.zones):
+            bit = np.int64(1) << np.int64(index)
+            inside = points_in_polygon(points, zone.polygon)
+            zone.occupancy = int(np.count_nonzero(inside & visible))
+
+            entered = inside & ((tracks.zones_entered[slots] & bit) == 0)
+            if entered.any():
+                zone.add(int(np.count_nonzero(entered)))
+                tracks.zones_entered[slots[entered]] |= bit
+
+    def flush_zone_counts(self):
+        """Conteos por línea/dirección y entradas por zona desde la última llamada.
+
+        Devuelve filas para la tabla zone_counts.
+        """
+        rows = []
+        for line in self.all_lines():
+            for direction in (CountingLine.POSITIVE, CountingLine.NEGATIVE):
+                if line.counts_direction(direction):
+                    rows.append({
+                        'zone_name': f"{line.name}:{direction}",
+                        'vehicle_count': line.take_pending(direction),
+                        'zone_coordinates': json.dumps(line.coordinates())
+                    })
+        for zone in self.zones:
+            rows.append({
+                'zone_name': zone.name,
+                'vehicle_count': zone.take_pending(),
+                'zone_coordinates': json.dumps(zone.coordinates())
+            })
+        return rows
+
+    def configure_model(self):
+        """Filtrar clase y confianza dentro del modelo para que NMS procese menos candidatos"""
+        self.model.conf = self.min_confidence
+        self.model.classes = self.vehicle_class_ids
+
+    def get_bboxes(self, prediction, index=0):
+        """Obtener detecciones de la imagen index desde el tensor xyxy (x1, y1, x2, y2, conf, clase).
+
+        Devuelve (centroides Nx2, cajas Nx4, ids de clase N).
+        """
+        pred = prediction.xyxy[index]
+        if hasattr(pred, 'cpu'):
+            pred = pred.cpu().numpy()
+        pred = np.asarray(pred).reshape(-1, 6)
+
+        class_ids = pred[:, 5].astype(np.int64)
+        keep = (pred[:, 4] >= self.min_confidence) & self.vehicle_class_mask[class_ids]
+        boxes = pred[keep, :4].astype(np.int32)
+        centroids = ((boxes[:, :2] + boxes[:, 2:]) // 2).astype(np.float32)
+        return centroids, boxes, class_ids[keep]
+
+    def detect_batch(self, frames):
+        """Detectar en varios frames con una sola llamada al modelo compartido"""
+        # El modelo es compartido: aplicar los filtros de esta instancia
+        self.configure_model()
+        prediction = self.model(frames)
+        return [self.get_bboxes(prediction, i) for i in range(len(frames))]
+
+    def update(self, frame, detections):
+        """Actualizar tracking, cruces y zonas con las detecciones de un frame"""
         # Establecer línea de conteo (usar posición configurable)
         if self.counting_line_y is None:
-            self.set_counting_line(frame.shape[0], position=self.line_position)
-            
-        # Detectar
+            self.set_counting_line(frame.shape[0], position=self.line_position, frame_width=frame.shape[1])
+        if self.zone_config_path:
+            self._apply_zone_config(frame)
+
+        self.new_counts = []
+
+        # Prever y corregir el tracking
+        self.tracker.predict()
+        self.update_tracking(detections)
+        self.detected_frames += 1
+
+        # Verificar cruces y zonas
+        self.check_line_crossings()
+        self.update_zones()
+
+        return self.new_counts
+
+    def predict(self, frame):
+        """Frame sin inferencia: mover los tracks con su velocidad y verificar cruces y zonas"""
+        self.new_counts = []
+        self.predicted_frames += 1
+
+        self.tracker.predict()
+        self.check_line_crossings()
+        self.update_zones()
+
+        return self.new_counts
+
+    def process(self, frame):
+        """Detectar (o prever, según max_stride), actualizar tracking y verificar cruces sin modificar el frame"""
+        if not self.should_detect():
+            return self.predict(frame)
+
+        # Detectar (el modelo es compartido: aplicar los filtros de esta instancia)
+        self.configure_model()
         prediction = self.model(frame)
         detections = self.get_bboxes(prediction)
-        
-        # Actualizar tracking
-        self.update_tracking(detections)
-        
-        # Dibujar línea de conteo
-        cv2.line(frame, (0, self.counting_line_y), 
-                (frame.shape[1], self.counting_line_y), (0, 255, 255), 3)
-        cv2.putText(frame, "LINEA DE CONTEO", (10, self.counting_line_y - 10),
-                   cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 255, 255), 2)
-        
-        # Dibujar objetos y verificar cruces
-        for object_id, obj in list(self.tracked_objects.items()):
-            bbox = obj['bbox']
-            centroid = obj['centroid']
-            display_name = obj['display_name']
-
-            # Verificar cruce
-            self.check_line_crossing(object_id)
+
+        return self.update(frame, detections)
+
+    def annotate(self, frame):
+        """Dibujar línea de conteo y objetos trackeados sobre el frame"""
+        if not self.annotator.enabled or self.counting_line_y is None:
+            return frame
+
+        # Dibujar líneas de conteo
+        for line in self.all_lines():
+            self.annotator.line(frame, line.p1, line.p2, (0, 255, 255), 3)
+            self.annotator.text(frame, line.name, line.p1[0] + 10, line.p1[1] - 10, (0, 255, 255))
+
+        # Dibujar zonas con su ocupación
+        for zone in self.zones:
+            self.annotator.polygon(frame, zone.polygon, (255, 200, 0))
+            x, y = zone.polygon[0]
+            self.annotator.text(frame, f"{zone.name}: {zone.occupancy}", x, y - 10, (255, 200, 0), scale=0.6)
+
+        # Dibujar objetos
+        tracks = self.tracks
+        for slot in tracks.active_slots().tolist():
+            bbox = tracks.bbox[slot]
 
             # Color según estado
-            if object_id in self.counted_ids:
+            if tracks.counted[slot]:
                 color = (255, 0, 255)  # Magenta: ya contado
             else:
                 color = (0, 255, 0)    # Verde: no contado
 
-            # Dibujar bbox
-            cv2.rectangle(frame, (bbox[0], bbox[1]), (bbox[2], bbox[3]), color, 2)
+            self.annotator.box(frame, bbox, color)
+            self.annotator.point(frame, tracks.centroid[slot], color)
 
-            # Dibujar centroide
-            cv2.circle(frame, centroid, 5, color, -1)
+            # Nombre con clasificación (ej: "Auto 1", "Persona 3"), texto negro sobre fondo de color
+            self.annotator.label(frame, self.display_name(slot), bbox[0], bbox[1], color)
 
-            # Dibujar nombre con clasificación (ej: "Auto 1", "Persona 3")
-            label_size, _ = cv2.getTextSize(display_name, cv2.FONT_HERSHEY_SIMPLEX, 0.6, 2)
+        return frame
 
-            # Fondo para el texto
-            cv2.rectangle(frame,
-                         (bbox[0], bbox[1] - label_size[1] - 10),
-                         (bbox[0] + label_size[0], bbox[1]),
-                         color, -1)
+    def start_detector_no_text(self, frame):
+        """Detectar, contar y dibujar sobre el frame"""
+        self.process(frame)
+        return self.annotate(frame)
 
-            # Texto en negro sobre fondo de color
-            cv2.putText(frame, display_name, (bbox[0], bbox[1] - 8),
-                       cv2.FONT_HERSHEY_SIMPLEX, 0.6, (0, 0, 0), 2)
-                   
-        return frame
-        
     def start_detector(self, frame):
         """Detectar con texto"""
         return self.start_detector_no_text(frame)
+
+
+class CountPipeline:
+    """Conteo para StreamEngine: un ObjectCount por stream y un solo modelo YOLOv5.
+
+    Todas las instancias de ObjectCount obtienen el mismo modelo del
+    registro, así que agregar cámaras sólo agrega estado de tracking.
+    """
+
+    def __init__(self, line_position=0.55, default_line=True, zones=None, stride=1):
+        self.line_position = line_position
+        self.default_line = default_line
+        self.zones = zones
+        self.stride = max(1, stride)
+
+    def create_state(self, name):
+        object_count = ObjectCount()
+        object_count.line_position = self.line_position
+        object_count.default_line_enabled = self.default_line
+        object_count.annotator.enabled = False
+        object_count.max_stride = self.stride
+        if self.zones:
+            object_count.load_zones(self.zones)
+        return object_count
+
+    def infer_batch(self, states, frames):
+        """Detecciones por frame; None en los frames que su stream sólo prevé (stride)"""
+        positions = defaultdict(list)
+        for i, state in enumerate(states):
+            positions[id(state)].append(i)
+
+        # Un mismo stream puede tener varios frames en el lote: planificar sus detecciones en orden
+        due = []
+        for indices in positions.values():
+            plan = states[indices[0]].detection_plan(len(indices))
+            due.extend(i for i, detect in zip(indices, plan) if detect)
+        due.sort()
+
+        detections = [None] * len(frames)
+        if due:
+            # Los filtros de clase/confianza son iguales en todos los streams
+            batch = states[due[0]].detect_batch([frames[i] for i in due])
+            for i, frame_detections in zip(due, batch):
+                detections[i] = frame_detections
+        return detections
+
+    def step(self, state, frame, detections):
+        if detections is None:
+            return state.predict(frame)
+        return state.update(frame, detections)
@@ -2,11 +2,16 @@ from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel,
                              QPushButton, QGroupBox, QComboBox, QLineEdit,
                              QFileDialog, QSplitter, QFrame, QMessageBox, QSlider)
 from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QImage, QPixmap, QFont
+from PyQt5.QtGui import QFont
 import cv2
 import os
+import time
+import uuid
 
 from lib.camera_capture import CameraCapture
+from lib.frame_worker import FrameWorker
+from lib.video_display import VideoDisplay
+from lib.database_manager import detection_writer
 from features.object_count.object_count import ObjectCount
 
 
@@ -14,7 +19,18 @@ class ObjectCountWidget(QWidget):
     def __init__(self):
         super().__init__()
         self.camera_capture = None
+        self.capture_connected = False
+        self.worker = None
+        self.display_enabled = True  # Dibujar anotaciones solo si el video se muestra
         self.objectCount = ObjectCount()
+        self.objectCount.max_stride = 3  # Con tráfico ralo, detectar cada 3 frames
+
+        # Vehículos contados y conteos por línea/zona (cada zone_flush_interval segundos)
+        # se guardan desde el hilo escritor, sin esperar al disco
+        self.writer = detection_writer()
+        self.session_id = uuid.uuid4().hex
+        self.zone_flush_interval = 60
+        self.last_zone_flush = time.monotonic()
         self.current_video_source = None
         self.initUI()
 
@@ -29,6 +45,7 @@ class ObjectCountWidget(QWidget):
         self.videoLabel.setAlignment(Qt.AlignCenter)
         self.videoLabel.setStyleSheet("background-color: #2b2b2b; color: white; border: 2px solid #444;")
         splitter.addWidget(self.videoLabel)
+        self.display = VideoDisplay(self.videoLabel, max_fps=30)  # Dibujo limitado a 30 Hz, separado del procesamiento
 
         # ===== PANEL DERECHO - CONTROLES Y CONTADOR (10%) =====
         right_panel = QWidget()
@@ -319,6 +336,7 @@ class ObjectCountWidget(QWidget):
 
         self.camera_capture = CameraCapture()
         self.camera_capture.video_path = file_path
+        self.capture_connected = False
 
         self.play_btn.setEnabled(True)
 
@@ -336,13 +354,24 @@ class ObjectCountWidget(QWidget):
 
         self.camera_capture = CameraCapture()
         self.camera_capture.video_path = url
+        self.capture_connected = False
 
         self.play_btn.setEnabled(True)
 
     def start_capture(self):
         """Iniciar captura"""
         if self.camera_capture:
-            self.camera_capture.frameCaptured.connect(self.updateVideoLabel)
+            if self.worker is None:
+                # La detección corre en su propio hilo; la interfaz solo muestra resultados
+                self.worker = FrameWorker(self.process_frame, max_queue=1)
+                self.worker.frameProcessed.connect(self.updateVideoLabel)
+                self.worker.start()
+
+            if not self.capture_connected:
+                # DirectConnection: el frame se encola desde el hilo de captura sin pasar por la interfaz
+                self.camera_capture.frameCaptured.connect(self.worker.submit, Qt.DirectConnection)
+                self.capture_connected = True
+
             self.camera_capture.start_capture()
 
             self.play_btn.setEnabled(False)
@@ -360,24 +389,59 @@ class ObjectCountWidget(QWidget):
         """Detener"""
         if self.camera_capture:
             self.camera_capture.stop_capture()
+            if self.worker:
+                self.worker.queue.clear()
             self.play_btn.setEnabled(True)
             self.pause_btn.setEnabled(False)
             self.stop_btn.setEnabled(False)
+            self.display.clear()
             self.videoLabel.setText("Detenido")
 
+    def flush_zone_counts(self):
+        """Guardar los conteos por línea/zona acumulados desde el último guardado"""
+        self.last_zone_flush = time.monotonic()
+        self.writer.record_zone_counts(self.objectCount.flush_zone_counts(), self.session_id)
+
+    def showEvent(self, event):
+        self.display_enabled = True
+        self.display.set_enabled(True)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.display_enabled = False
+        self.display.set_enabled(False)
+        super().hideEvent(event)
+
+    def shutdown(self):
+        """Detener captura e hilo de procesamiento antes de destruir el widget"""
+        if self.camera_capture:
+            self.camera_capture.stop_capture()
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+        self.flush_zone_counts()
+
     def reset_counter(self):
         """Reiniciar contador"""
         self.objectCount.count_detection = 0
         self.objectCount.detected_cars = []
         self.counterLabel.setText("0")
 
-    def updateVideoLabel(self, frame):
-        """Procesar y mostrar frame"""
-        frame = self.objectCount.start_detector_no_text(frame)
-        self.counterLabel.setText(str(self.objectCount.count_detection))
+    def process_frame(self, frame, index, captured_at):
+        """Detectar y contar en el hilo de trabajo (sin tocar la interfaz)"""
+        for event in self.objectCount.process(frame):
+            if event['first']:
+                self.writer.record_vehicle(event['class_name'], event['bbox'], source=self.current_video_source)
+
+        if time.monotonic() - self.last_zone_flush >= self.zone_flush_interval:
+            self.flush_zone_counts()
+
+        if self.display_enabled:
+            self.objectCount.annotate(frame)
+        return frame, {'count': self.objectCount.count_detection}
+
+    def updateVideoLabel(self, frame, result):
+        """Mostrar frame procesado"""
+        self.counterLabel.setText(str(result['count']))
 
-        height, width, channels = frame.shape
-        bytes_per_line = channels * width
-        p = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(p)
-        self.videoLabel.setPixmap(pixmap.scaled(self.videoLabel.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
+        self.display.submit(frame)
@@ -0,0 +1,154 @@
+import json
+import numpy as np
+
+
+class CountingLine:
+    """Línea de conteo (segmento p1-p2) con dirección.
+
+    La dirección se mide respecto al lado de la línea: 'positive' cuenta
+    los objetos que pasan al lado derecho del segmento recorrido de p1 a
+    p2 (para una línea horizontal de izquierda a derecha, de arriba hacia
+    abajo), 'negative' el sentido contrario y 'both' ambos.
+    """
+
+    POSITIVE = 'positive'
+    NEGATIVE = 'negative'
+    BOTH = 'both'
+
+    def __init__(self, name, p1, p2, direction=POSITIVE):
+        if direction not in (self.POSITIVE, self.NEGATIVE, self.BOTH):
+            raise ValueError(f"Dirección desconocida: {direction}")
+        self.name = name
+        self.p1 = (float(p1[0]), float(p1[1]))
+        self.p2 = (float(p2[0]), float(p2[1]))
+        self.direction = direction
+        self.counts = {self.POSITIVE: 0, self.NEGATIVE: 0}
+        self._pending = {self.POSITIVE: 0, self.NEGATIVE: 0}
+
+    def counts_direction(self, direction):
+        return self.direction in (direction, self.BOTH)
+
+    def add(self, direction, count=1):
+        self.counts[direction] += count
+        self._pending[direction] += count
+
+    def take_pending(self, direction):
+        """Conteo desde la última lectura (y reiniciarlo)"""
+        count = self._pending[direction]
+        self._pending[direction] = 0
+        return count
+
+    def coordinates(self):
+        return [[round(x, 1), round(y, 1)] for x, y in (self.p1, self.p2)]
+
+
+class CountingZone:
+    """Zona poligonal: cuenta entradas y ocupación actual"""
+
+    def __init__(self, name, polygon):
+        polygon = np.asarray(polygon, dtype=np.float32)
+        if polygon.ndim != 2 or polygon.shape[0] < 3 or polygon.shape[1] != 2:
+            raise ValueError(f"La zona '{name}' necesita al menos 3 puntos (x, y)")
+        self.name = name
+        self.polygon = polygon
+        self.entries = 0
+        self.occupancy = 0
+        self._pending = 0
+
+    def add(self, count=1):
+        self.entries += count
+        self._pending += count
+
+    def take_pending(self):
+        """Entradas desde la última lectura (y reiniciarlas)"""
+        count = self._pending
+        self._pending = 0
+        return count
+
+    def coordinates(self):
+        return np.round(self.polygon.astype(np.float64), 1).tolist()
+
+
+def side_of_lines(points, p1, p2):
+    """Producto cruz de cada punto respecto a cada línea (N puntos x L líneas).
+
+    > 0: lado derecho (positivo) de p1->p2, < 0: lado izquierdo, 0: sobre la línea.
+    """
+    d = p2 - p1                                        # (L, 2)
+    rel = points[:, None, :] - p1[None, :, :]          # (N, L, 2)
+    return d[None, :, 0] * rel[..., 1] - d[None, :, 1] * rel[..., 0]
+
+
+def line_crossings(prev_points, curr_points, p1, p2):
+    """Cruces de todos los recorridos prev->curr con todas las líneas.
+
+    Devuelve una matriz (N x L) con +1 (cruce positivo), -1 (negativo) o 0.
+    """
+    if len(prev_points) == 0 or len(p1) == 0:
+        return np.zeros((len(prev_points), len(p1)), dtype=np.int8)
+
+    side_prev = side_of_lines(prev_points, p1, p2)
+    side_curr = side_of_lines(curr_points, p1, p2)
+
+    # Los extremos de la línea deben quedar a lados opuestos del recorrido (o sobre él)
+    move = curr_points - prev_points                                    # (N, 2)
+    rel1 = p1[None, :, :] - prev_points[:, None, :]                     # (N, L, 2)
+    rel2 = p2[None, :, :] - prev_points[:, None, :]
+    end1 = move[:, None, 0] * rel1[..., 1] - move[:, None, 1] * rel1[..., 0]
+    end2 = move[:, None, 0] * rel2[..., 1] - move[:, None, 1] * rel2[..., 0]
+    within = end1 * end2 <= 0
+
+    positive = (side_prev < 0) & (side_curr >= 0) & within
+    negative = (side_prev > 0) & (side_curr <= 0) & within
+    return positive.astype(np.int8) - negative.astype(np.int8)
+
+
+def points_in_polygon(points, polygon):
+    """Prueba de punto en polígono (ray casting) para todos los puntos a la vez"""
+    if len(points) == 0:
+        return np.zeros(0, dtype=bool)
+
+    x = points[:, 0:1]                      # (N, 1)
+    y = points[:, 1:2]
+    x1 = polygon[:, 0][None, :]             # (1, V)
+    y1 = polygon[:, 1][None, :]
+    x2 = np.roll(polygon[:, 0], -1)[None, :]
+    y2 = np.roll(polygon[:, 1], -1)[None, :]
+
+    straddles = (y1 > y) != (y2 > y)
+    with np.errstate(divide='ignore', invalid='ignore'):
+        x_cross = x1 + (y - y1) * (x2 - x1) / (y2 - y1)
+    hits = straddles & (x < x_cross)
+    return (np.count_nonzero(hits, axis=1) % 2) == 1
+
+
+def load_zone_config(path, frame_size=None):
+    """Leer líneas y zonas desde JSON.
+
+    Formato:
+        {"normalized": false,
+         "lines": [{"name": "carril1", "points": [[x1, y1], [x2, y2]], "direction": "positive"}],
+         "zones": [{"name": "cruce", "polygon": [[x, y], ...]}]}
+
+    Con "normalized": true las coordenadas van de 0 a 1 y se escalan con
+    frame_size (ancho, alto).
+    """
+    with open(path, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+
+    scale = np.ones(2, dtype=np.float32)
+    if config.get('normalized'):
+        if frame_size is None:
+            raise ValueError("Coordenadas normalizadas requieren el tamaño del frame")
+        scale = np.array(frame_size, dtype=np.float32)
+
+    lines = []
+    for item in config.get('lines', []):
+        p1, p2 = (np.asarray(point, dtype=np.float32) * scale for point in item['points'])
+        lines.append(CountingLine(item['name'], p1, p2, item.get('direction', CountingLine.POSITIVE)))
+
+    zones = []
+    for item in config.get('zones', []):
+        zones.append(CountingZone(item['name'], np.asarray(item['polygon'], dtype=np.float32) * scale))
+
+    return lines, zones
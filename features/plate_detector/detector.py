@@ -1,16 +1,37 @@
+import os
+import queue
 import numpy as np
 import cv2
-from tensorflow.lite.python.interpreter import Interpreter
+from contextlib import contextmanager
+from concurrent.futures import ThreadPoolExecutor
+from tensorflow.lite.python.interpreter import Interpreter, OpResolverType
 import string
 import random
+from lib.annotator import Annotator
+from lib.model_registry import registry
+
+
+# Resultado de detección: caja en pixeles (ymin, xmin, ymax, xmax), id de clase y confianza
+DETECTION_DTYPE = np.dtype([
+    ('box', np.float32, (4,)),
+    ('class_id', np.int32),
+    ('score', np.float32),
+])
+
+
+MODEL_PATH = "assets/models/detect.tflite"
+LABEL_PATH = "assets/labels/labelmap.txt"
 
 
 class Detector:
-    def __init__(self, min_confidence=0.5):
-        self.model_path = "assets/models/detect.tflite"
-        self.label_path = "assets/labels/labelmap.txt"
+    def __init__(self, min_confidence=0.5, max_batch_size=8, num_threads=None, use_xnnpack=True,
+                 model_path=MODEL_PATH, label_path=LABEL_PATH):
+        self.model_path = model_path
+        self.label_path = label_path
         self.min_confidence = min_confidence
-        self.interpreter = Interpreter(model_path=self.model_path)
+        self.num_threads = num_threads  # None: valor por defecto de TFLite
+        self.use_xnnpack = use_xnnpack
+        self.interpreter = self._create_interpreter()
         self.interpreter.allocate_tensors()
         self.input_details = self.interpreter.get_input_details()
         self.output_details = self.interpreter.get_output_details()
@@ -19,8 +40,74 @@ class Detector:
         self.float_input = (self.input_details[0]['dtype'] == np.float32)
         self.input_mean = 127.5
         self.input_std = 127.5
-        self.min_conf = 0.5
+        self._allocate_input_buffers()
+        self.max_batch_size = max_batch_size
+        self.supports_batch = True
+        self._batch_size = 1
+        self._batch_input = None
+        self.min_conf = min_confidence
+        self.save_confidence = 0.90  # Guardar/leer placas con > 90% confianza
         self.labels = self.load_labels()
+        self._scale = None
+        self._scale_shape = None
+        self.annotator = Annotator()
+
+    def _create_interpreter(self):
+        """Crear el intérprete TFLite con los hilos y delegados configurados"""
+        kwargs = {'model_path': self.model_path, 'num_threads': self.num_threads}
+        if not self.use_xnnpack:
+            # XNNPACK es el delegado por defecto de TFLite; este resolver lo excluye
+            kwargs['experimental_op_resolver_type'] = OpResolverType.BUILTIN_WITHOUT_DEFAULT_DELEGATES
+        return Interpreter(**kwargs)
+
+    def _allocate_input_buffers(self):
+        """Reservar una sola vez los buffers de preprocesamiento"""
+        self._resized = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._rgb = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self._input = np.empty((1, self.height, self.width, 3), dtype=self.input_details[0]['dtype'])
+        if self.float_input:
+            # Tabla de normalización: (pixel - media) / desviación para los 256 valores posibles
+            self._norm_lut = (np.arange(256, dtype=np.float32) - self.input_mean) / self.input_std
+
+    def preprocess(self, frame, out):
+        """Redimensionar, convertir a RGB y normalizar el frame escribiendo directo en out"""
+        # Redimensionar primero: la conversión de color se hace sobre la imagen pequeña
+        cv2.resize(frame, (self.width, self.height), dst=self._resized)
+        if self.float_input:
+            cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=self._rgb)
+            cv2.LUT(self._rgb, self._norm_lut, dst=out)
+        else:
+            cv2.cvtColor(self._resized, cv2.COLOR_BGR2RGB, dst=out)
+        return out
+
+    def _set_batch_size(self, batch_size):
+        """Redimensionar el tensor de entrada del intérprete a batch_size frames"""
+        if batch_size == self._batch_size:
+            return True
+
+        index = self.input_details[0]['index']
+        try:
+            self.interpreter.resize_tensor_input(index, [batch_size, self.height, self.width, 3])
+            self.interpreter.allocate_tensors()
+        except Exception as e:
+            print(f"⚠️ El modelo no soporta batch dinámico ({e}), se procesará frame a frame")
+            self.supports_batch = False
+            self.interpreter.resize_tensor_input(index, [1, self.height, self.width, 3])
+            self.interpreter.allocate_tensors()
+            self._batch_size = 1
+            return False
+
+        self._batch_size = batch_size
+        if batch_size > 1:
+            self._batch_input = np.empty((batch_size, self.height, self.width, 3), dtype=self._input.dtype)
+        return True
+
+    def _read_outputs(self):
+        """Leer cajas, clases y puntajes de la última inferencia"""
+        boxes = self.interpreter.get_tensor(self.output_details[1]['index'])
+        classes = self.interpreter.get_tensor(self.output_details[3]['index'])
+        scores = self.interpreter.get_tensor(self.output_details[0]['index'])
+        return boxes, classes, scores
 
     @staticmethod
     def randomName():
@@ -31,54 +118,172 @@ class Detector:
         with open(self.label_path, 'r') as file:
             return [line.strip() for line in file.readlines()]
 
+    def label(self, class_id):
+        """Nombre de la clase para un id"""
+        return self.labels[int(class_id)]
+
+    def should_save(self, detections):
+        """Hay alguna detección con confianza suficiente para leer la placa"""
+        return bool(np.any(detections['score'] > self.save_confidence))
+
+    def postprocess(self, boxes, classes, scores, imW, imH):
+        """Filtrar y escalar todas las cajas con una sola máscara"""
+        mask = (scores > self.min_conf) & (scores <= 1.0)
+        count = int(np.count_nonzero(mask))
+        detections = np.empty(count, dtype=DETECTION_DTYPE)
+        if count == 0:
+            return detections
+
+        if self._scale_shape != (imH, imW):
+            self._scale = np.array([imH, imW, imH, imW], dtype=np.float32)
+            self._scale_shape = (imH, imW)
+
+        detections['box'] = boxes[mask] * self._scale
+        detections['class_id'] = classes[mask]
+        detections['score'] = scores[mask]
+        return detections
+
     def detect(self, frame):
-        isSave = False
-        detections_list = []  # Lista para almacenar detecciones
-        image_rgb = cv2.cvtColor(frame, cv2.COLOR_BGR2RGB)
+        """Detectar placas sin modificar el frame. Devuelve arreglo DETECTION_DTYPE"""
         imH, imW, _ = frame.shape
-        image_resized = cv2.resize(image_rgb, (self.width, self.height))
-        input_data = np.expand_dims(image_resized, axis=0)
-
-        if self.float_input:
-            input_data = (np.float32(input_data) -
-                          self.input_mean) / self.input_std
+        self._set_batch_size(1)
+        self.preprocess(frame, self._input[0])
 
-        self.interpreter.set_tensor(self.input_details[0]['index'], input_data)
+        self.interpreter.set_tensor(self.input_details[0]['index'], self._input)
         self.interpreter.invoke()
 
-        boxes = self.interpreter.get_tensor(self.output_details[1]['index'])[0]
-        classes = self.interpreter.get_tensor(self.output_details[3]['index'])[
-            0]
-        scores = self.interpreter.get_tensor(self.output_details[0]['index'])[
-            0]
-
-        for i in range(len(scores)):
-            if (scores[i] > self.min_conf) and (scores[i] <= 1.0):
-                ymin, xmin, ymax, xmax = boxes[i]
-                (xmin, xmax, ymin, ymax) = (
-                    xmin * imW, xmax * imW, ymin * imH, ymax * imH)
-
-                # Guardar detección
-                detections_list.append({
-                    'box': (ymin, xmin, ymax, xmax),
-                    'class': self.labels[int(classes[i])],
-                    'score': scores[i]
-                })
-
-                cv2.rectangle(frame, (int(xmin), int(ymin)),
-                              (int(xmax), int(ymax)), (10, 255, 0), 2)
-
-                object_name = self.labels[int(classes[i])]
-                label = '%s: %d%%' % (object_name, int(scores[i]*100))
-
-                if scores[i] > 0.90:  # Detectar placas con > 90% confianza
-                    isSave = True
-                labelSize, baseLine = cv2.getTextSize(
-                    label, cv2.FONT_HERSHEY_SIMPLEX, 0.7, 2)
-                label_ymin = max(ymin, labelSize[1] + 10)
-                cv2.rectangle(frame, (int(xmin), int(label_ymin-labelSize[1]-10)), (int(
-                    xmin+labelSize[0]), int(label_ymin+baseLine-10)), (255, 255, 255), cv2.FILLED)
-                cv2.putText(frame, label, (int(xmin), int(label_ymin-7)),
-                            cv2.FONT_HERSHEY_SIMPLEX, 0.7, (0, 0, 0), 2)
-
-        return [frame, isSave, self.randomName(), detections_list]
+        boxes, classes, scores = self._read_outputs()
+        return self.postprocess(boxes[0], classes[0], scores[0], imW, imH)
+
+    def detect_batch(self, frames, batch_size=None):
+        """Detectar en varios frames con una sola inferencia por lote.
+
+        Devuelve una lista de arreglos DETECTION_DTYPE, uno por frame.
+        Con batch_size=1 (o si el modelo no soporta batch) procesa frame a frame.
+        """
+        if batch_size is None:
+            batch_size = self.max_batch_size
+        batch_size = max(1, min(batch_size, len(frames))) if frames else 1
+
+        if batch_size == 1 or not self.supports_batch:
+            return [self.detect(frame) for frame in frames]
+
+        results = []
+        for start in range(0, len(frames), batch_size):
+            chunk = frames[start:start + batch_size]
+            if not self._set_batch_size(batch_size):
+                results.extend(self.detect(frame) for frame in chunk)
+                continue
+
+            # El último lote puede venir incompleto: las posiciones sobrantes se ignoran
+            for slot, frame in enumerate(chunk):
+                self.preprocess(frame, self._batch_input[slot])
+
+            self.interpreter.set_tensor(self.input_details[0]['index'], self._batch_input)
+            self.interpreter.invoke()
+
+            boxes, classes, scores = self._read_outputs()
+            if boxes.shape[0] < len(chunk):
+                # El postprocesado del modelo solo devolvió el primer frame del lote
+                print("⚠️ El modelo no devuelve resultados por frame en batch, se procesará frame a frame")
+                self.supports_batch = False
+                self._set_batch_size(1)
+                results.extend(self.detect(frame) for frame in chunk)
+                continue
+
+            for slot, frame in enumerate(chunk):
+                imH, imW = frame.shape[:2]
+                results.append(self.postprocess(boxes[slot], classes[slot], scores[slot], imW, imH))
+
+        return results
+
+    def annotate(self, frame, detections):
+        """Dibujar detecciones sobre el frame (no-op si el anotador está desactivado)"""
+        if not self.annotator.enabled:
+            return frame
+
+        for (ymin, xmin, ymax, xmax), class_id, score in zip(
+                detections['box'].tolist(), detections['class_id'].tolist(),
+                detections['score'].tolist()):
+            self.annotator.box(frame, (xmin, ymin, xmax, ymax), (10, 255, 0))
+            label = '%s: %d%%' % (self.labels[class_id], int(score*100))
+            self.annotator.label(frame, label, xmin, ymin, (255, 255, 255), scale=0.7)
+
+        return frame
+
+
+class DetectorPool:
+    """Pool de detectores: un intérprete por hilo de trabajo, mismo modelo.
+
+    Un intérprete TFLite no se puede usar desde varios hilos a la vez;
+    con el pool cada hilo toma su propio detector. detect_batch reparte
+    los frames del lote entre los detectores y los infiere en paralelo
+    (TFLite libera el GIL durante invoke). Se usa en lugar de un Detector:
+    etiquetas, anotación y umbral de guardado son los del primer detector.
+    """
+
+    def __init__(self, size=None, num_threads=None, **detector_kwargs):
+        cpu_count = os.cpu_count() or 1
+        self.size = size or cpu_count
+        if num_threads is None:
+            # Repartir los núcleos entre los intérpretes del pool
+            num_threads = max(1, cpu_count // self.size)
+
+        self.detectors = [Detector(num_threads=num_threads, **detector_kwargs) for _ in range(self.size)]
+        self._available = queue.Queue()
+        for detector in self.detectors:
+            self._available.put(detector)
+        self._executor = ThreadPoolExecutor(max_workers=self.size, thread_name_prefix="plate-detector")
+
+    @contextmanager
+    def acquire(self, timeout=None):
+        """Tomar un detector libre (bloquea hasta que haya uno disponible)"""
+        detector = self._available.get(timeout=timeout)
+        try:
+            yield detector
+        finally:
+            self._available.put(detector)
+
+    def detect(self, frame):
+        with self.acquire() as detector:
+            return detector.detect(frame)
+
+    def _detect_chunk(self, frames, batch_size):
+        with self.acquire() as detector:
+            return detector.detect_batch(frames, batch_size)
+
+    def detect_batch(self, frames, batch_size=None):
+        """Detectar repartiendo los frames en partes iguales entre los detectores.
+
+        Devuelve una lista de arreglos DETECTION_DTYPE en el orden de frames.
+        """
+        if self.size == 1 or len(frames) <= 1:
+            return self._detect_chunk(frames, batch_size)
+
+        step = -(-len(frames) // self.size)
+        chunks = [frames[start:start + step] for start in range(0, len(frames), step)]
+        results = []
+        for chunk_results in self._executor.map(self._detect_chunk, chunks, [batch_size] * len(chunks)):
+            results.extend(chunk_results)
+        return results
+
+    @property
+    def annotator(self):
+        return self.detectors[0].annotator
+
+    @property
+    def save_confidence(self):
+        return self.detectors[0].save_confidence
+
+    def should_save(self, detections):
+        return self.detectors[0].should_save(detections)
+
+    def label(self, class_id):
+        return self.detectors[0].label(class_id)
+
+    def annotate(self, frame, detections):
+        return self.detectors[0].annotate(frame, detections)
+
+
+# Detector compartido por la interfaz (se carga la primera vez que se usa)
+registry.register('plate_detector', Detector)
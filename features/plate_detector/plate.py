@@ -1,15 +1,83 @@
-import os
 import cv2
-from ultralytics import YOLO
 from lib.util import read_license_plate
+from lib.model_registry import registry
 
-license_plate_detector = YOLO('assets/models/license_plate_detector.pt')
+LICENSE_PLATE_MODEL_PATH = 'assets/models/license_plate_detector.pt'
+ROI_PADDING = 0.15        # Margen alrededor de la caja del detector TFLite
+SKIP_REFINE_SCORE = 0.97  # Con esta confianza la caja TFLite se lee directo, sin YOLO
+
+
+def load_license_plate_detector():
+    """Cargar el modelo YOLO de placas (ultralytics se importa solo al cargar)"""
+    from ultralytics import YOLO
+    return YOLO(LICENSE_PLATE_MODEL_PATH)
+
+
+registry.register('license_plate_yolo', load_license_plate_detector)
+
+
+def crop_roi(frame, box, padding=ROI_PADDING):
+    """Recorte con margen alrededor de una caja (ymin, xmin, ymax, xmax) en píxeles.
+
+    Devuelve (recorte, (x1, y1)): la esquina del recorte en el frame.
+    """
+    height, width = frame.shape[:2]
+    ymin, xmin, ymax, xmax = (float(value) for value in box)
+    pad_x = (xmax - xmin) * padding
+    pad_y = (ymax - ymin) * padding
+    x1 = max(0, int(xmin - pad_x))
+    y1 = max(0, int(ymin - pad_y))
+    x2 = min(width, int(xmax + pad_x) + 1)
+    y2 = min(height, int(ymax + pad_y) + 1)
+    return frame[y1:y2, x1:x2], (x1, y1)
+
+
+def read_crop(license_plate_crop):
+    """Mejorar el recorte de la placa y leer el texto (None si el OCR falla).
+
+    No guarda la imagen: las capturas se guardan con lib.capture_storage.
+    """
+    if license_plate_crop.size == 0:
+        return None
+    # improve the image
+    alpha = 1.0
+    beta = 0
+    contrast_image = cv2.convertScaleAbs(license_plate_crop, alpha=alpha, beta=beta)
+    # read license plate number
+    return read_license_plate(contrast_image)
+
+
+def refine_roi(roi):
+    """Ajustar la caja de la placa con YOLO dentro del recorte (no en el frame completo).
+
+    Devuelve el recorte ajustado, o el recorte original si YOLO no encuentra placa.
+    """
+    license_plate_detector = registry.get('license_plate_yolo')
+    boxes = license_plate_detector(roi, verbose=False)[0].boxes
+    if len(boxes) == 0:
+        return roi
+    best = int(boxes.conf.argmax())
+    x1, y1, x2, y2 = map(int, boxes.xyxy[best])
+    return roi[max(0, y1):y2, max(0, x1):x2]
+
+
+def read_roi(roi, refine=True):
+    """Leer la placa de un recorte alrededor de una caja del detector TFLite"""
+    if refine:
+        roi = refine_roi(roi)
+    return read_crop(roi)
 
 
 class Plate:
+    """Lectura de placa buscando con YOLO en el frame completo.
+
+    Con las cajas del Detector conviene leer sólo los recortes (crop_roi + read_roi).
+    """
+
     def __init__(self, frame):
         self.license_plate_text = None
         self.frame = frame
+        license_plate_detector = registry.get('license_plate_yolo')
         self.license_plates = license_plate_detector(frame)[0]
 
     def get(self):
@@ -18,14 +86,7 @@ class Plate:
             # object details
             x1, y1, x2, y2 = map(int, boxes[0].xyxy[0])
             # crop license plate
-            license_plate_crop = self.frame[y1:y2, x1: x2, :]
-            # improve the image
-            alpha = 1.0
-            beta = 0
-            contrast_image = cv2.convertScaleAbs(license_plate_crop, alpha=alpha, beta=beta)
-            # read license plate number
-            result = read_license_plate(contrast_image)
-            cv2.imwrite(os.path.join('assets/images/capture/', f"{result}-1.jpg"), contrast_image)
+            result = read_crop(self.frame[y1:y2, x1: x2, :])
             if result is not None:
                 self.license_plate_text = result
                 break
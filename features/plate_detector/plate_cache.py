@@ -0,0 +1,134 @@
+import time
+import threading
+from collections import defaultdict
+
+
+def valid_plate(text):
+    """Formato de placa válido (ABC-1234)"""
+    from lib.util import license_complies_format
+    return bool(text) and license_complies_format(text)
+
+
+def vote_plate(reads):
+    """Votación por carácter ponderada por confianza.
+
+    reads: lista de (texto, confianza). Se usa el largo con más peso y,
+    en cada posición, el carácter con más peso acumulado.
+    """
+    by_length = defaultdict(list)
+    for text, confidence in reads:
+        by_length[len(text)].append((text, confidence))
+    if not by_length:
+        return None
+
+    candidates = max(by_length.values(), key=lambda group: sum(confidence for _, confidence in group))
+    length = len(candidates[0][0])
+    voted = []
+    for position in range(length):
+        weights = defaultdict(float)
+        for text, confidence in candidates:
+            weights[text[position]] += confidence
+        voted.append(max(weights, key=weights.get))
+    return ''.join(voted)
+
+
+class PlateCache:
+    """Placa leída por vehículo seguido (id del tracker), con votación entre lecturas.
+
+    Se hace OCR del vehículo sólo hasta que min_agreeing lecturas coinciden
+    con el resultado de la votación (o se llega a max_reads intentos, contando
+    los fallidos); desde ahí la placa queda fija (vacía si no hubo acuerdo)
+    y no se vuelve a leer mientras el vehículo siga en escena. Las entradas
+    de vehículos que no se ven hace ttl segundos se eliminan. Seguro para
+    usar desde el hilo de detección y el de la interfaz.
+    """
+
+    def __init__(self, ttl=5.0, min_agreeing=3, max_reads=8, validate=None):
+        self.ttl = ttl
+        self.min_agreeing = min_agreeing
+        self.max_reads = max_reads
+        self.validate = validate
+        self._entries = {}
+        self._lock = threading.Lock()
+        self.reads = 0
+        self.skipped = 0
+
+    def _entry(self, track_id, now):
+        entry = self._entries.get(track_id)
+        if entry is None:
+            entry = {'reads': [], 'attempts': 0, 'plate': None, 'pending': False, 'last_seen': now}
+            self._entries[track_id] = entry
+        return entry
+
+    def touch(self, track_ids, now=None):
+        """Marcar vehículos vistos en este frame y olvidar los que expiraron"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            for track_id in track_ids:
+                entry = self._entries.get(track_id)
+                if entry is not None:
+                    entry['last_seen'] = now
+            expired = [track_id for track_id, entry in self._entries.items() if now - entry['last_seen'] > self.ttl]
+            for track_id in expired:
+                del self._entries[track_id]
+
+    def request_read(self, track_id, now=None):
+        """¿Hay que leer la placa de este vehículo? Si es así, queda marcado como pendiente"""
+        now = time.monotonic() if now is None else now
+        with self._lock:
+            entry = self._entry(track_id, now)
+            if entry['plate'] is not None or entry['pending']:
+                self.skipped += 1
+                return False
+            entry['pending'] = True
+            return True
+
+    def cancel_read(self, track_id):
+        """La lectura pendiente no se hizo (pool ocupado o error)"""
+        with self._lock:
+            entry = self._entries.get(track_id)
+            if entry is not None:
+                entry['pending'] = False
+
+    def add_read(self, track_id, text, confidence):
+        """Agregar una lectura. Devuelve la placa cuando queda decidida (una sola vez), si no None.
+
+        Las lecturas fallidas (texto vacío) cuentan como intento para max_reads.
+        """
+        with self._lock:
+            entry = self._entries.get(track_id)
+            if entry is None or entry['plate'] is not None:
+                return None
+            entry['pending'] = False
+            entry['attempts'] += 1
+            self.reads += 1
+            if text:
+                entry['reads'].append((text, confidence))
+
+            voted = vote_plate(entry['reads'])
+            if self.validate is not None and not self.validate(voted):
+                voted = None
+
+            exhausted = entry['attempts'] >= self.max_reads
+            agreeing = sum(1 for read, _ in entry['reads'] if read == voted)
+            if voted is not None and (agreeing >= self.min_agreeing or exhausted):
+                entry['plate'] = voted
+                return voted
+            if exhausted:
+                # Sin resultado válido tras max_reads intentos: no seguir leyendo este vehículo
+                entry['plate'] = ''
+            return None
+
+    def plate(self, track_id):
+        """Placa decidida para el vehículo (None si todavía no)"""
+        with self._lock:
+            entry = self._entries.get(track_id)
+            return (entry['plate'] or None) if entry is not None else None
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self):
+        with self._lock:
+            return {'tracks': len(self._entries), 'reads': self.reads, 'skipped': self.skipped}
@@ -2,38 +2,59 @@ import os
 import cv2
 import time
 import numpy as np
-from PyQt5.QtCore import Qt
-from PyQt5.QtGui import QImage, QPixmap, QFont
+from PyQt5.QtCore import Qt, pyqtSignal
+from PyQt5.QtGui import QFont
 from PyQt5.QtWidgets import (QWidget, QLabel, QSplitter, QVBoxLayout, QHBoxLayout,
                              QPushButton, QGroupBox, QComboBox, QLineEdit, QFileDialog,
                              QMessageBox, QListWidget, QListWidgetItem, QFrame)
 from features.plate_detector.detector import Detector
-from features.plate_detector.plate import Plate
+from lib.model_registry import registry
 from lib.camera_capture import CameraCapture
+from lib.frame_worker import FrameWorker
+from lib.video_display import VideoDisplay
+from lib.database_manager import detection_writer
+from lib.capture_storage import capture_storage
+from lib.tracker import KalmanTracker
+from lib.speed_estimator import FrameClock, video_fps, load_speed_estimator
+from features.plate_detector.plate import crop_roi, SKIP_REFINE_SCORE
+from features.plate_detector.plate_reader_pool import plate_reader_pool
+from features.plate_detector.plate_cache import PlateCache, valid_plate
 
 
 class PlateDetectorWidget(QWidget):
+    # Resultado de una lectura de placa del pool (llega desde un hilo del pool)
+    plateRead = pyqtSignal(object)
+
     def __init__(self):
         super().__init__()
         self.camera_capture = None
-        self.detector = Detector()
+        self.capture_connected = False
+        self.worker = None
+        self.display_enabled = True  # Dibujar anotaciones solo si el video se muestra
+        self.detector = registry.get('plate_detector')  # Compartido entre instancias del widget
+        self.writer = detection_writer()  # Placas leídas a vehicle_detections, sin esperar al disco
+        self.captures = capture_storage()  # Recortes de placas a disco en segundo plano
+        self.plate_reader = plate_reader_pool()  # YOLO + OCR en procesos aparte, sin frenar el video
+        self.plateRead.connect(self.on_plate_read)
         self.detected_plates = set()  # Set de placas ÚNICAS detectadas
         self.current_video_source = None
         self.last_plate_image = None
         self.detection_count = 0  # Contador total de detecciones
 
-        # Variables para cálculo de velocidad
-        self.tracked_vehicles = {}  # {id: {'positions': [(x,y,time)], 'speed': km/h}}
-        self.next_vehicle_id = 0
+        # Velocidad: seguimiento con filtro de Kalman, tiempo de cada frame según el video
+        # y posición en metros con la calibración de la cámara (assets/calibration/<fuente>.json)
+        self.tracker = KalmanTracker(max_distance=100, max_disappeared=10)
         self.last_speed = 0
-        self.pixels_per_meter = 8.8  # Calibración: ~8.8 pixels = 1 metro (ajustable)
-        self.fps = 30  # FPS del video
-
-        # Cooldown para evitar detecciones repetidas
+        self.pixels_per_meter = 8.8  # Sin calibración: ~8.8 pixels = 1 metro (ajustable)
+        self.fps = 30  # FPS si el video no lo informa
+        self.frame_clock = FrameClock(self.fps)
+        self.speed_estimator = None  # Se crea con el primer frame de cada fuente
+        self.reset_requested = False  # clear_history pide reiniciar el tracking; lo aplica el hilo de trabajo
+
+        # Placa por vehículo seguido: se lee hasta que 3 lecturas coinciden y no se vuelve
+        # a leer mientras el vehículo siga en escena (se olvida tras 5 s sin verlo)
         self.last_detection_time = 0
-        self.detection_cooldown = 3.0  # 3 segundos de espera entre detecciones
-        self.frames_since_detection = 0
-        self.cooldown_frames = 60  # ~2 segundos a 30fps
+        self.plate_cache = PlateCache(ttl=5.0, min_agreeing=3, max_reads=8, validate=valid_plate)
 
         self.initUI()
 
@@ -47,6 +68,7 @@ class PlateDetectorWidget(QWidget):
         self.videoLabel.setAlignment(Qt.AlignCenter)
         self.videoLabel.setStyleSheet("background-color: #2b2b2b; color: white; border: 2px solid #444;")
         splitter.addWidget(self.videoLabel)
+        self.display = VideoDisplay(self.videoLabel, max_fps=30)  # Dibujo limitado a 30 Hz, separado del procesamiento
 
         # ===== PANEL DERECHO - CONTROLES =====
         right_panel = QWidget()
@@ -267,12 +289,15 @@ class PlateDetectorWidget(QWidget):
 
         self.file_path_edit.setText(file_path)
         self.current_video_source = file_path
+        self.frame_clock = FrameClock(video_fps(file_path) or self.fps)
+        self.speed_estimator = None
 
         if self.camera_capture:
             self.camera_capture.stop_capture()
 
         self.camera_capture = CameraCapture()
         self.camera_capture.video_path = file_path
+        self.capture_connected = False
         self.play_btn.setEnabled(True)
 
     def load_stream(self):
@@ -283,18 +308,31 @@ class PlateDetectorWidget(QWidget):
             return
 
         self.current_video_source = url
+        self.frame_clock = FrameClock(live=True)  # Tiempo de llegada de cada frame
+        self.speed_estimator = None
 
         if self.camera_capture:
             self.camera_capture.stop_capture()
 
         self.camera_capture = CameraCapture()
         self.camera_capture.video_path = url
+        self.capture_connected = False
         self.play_btn.setEnabled(True)
 
     def start_capture(self):
         """Iniciar"""
         if self.camera_capture:
-            self.camera_capture.frameCaptured.connect(self.updateVideoLabel)
+            if self.worker is None:
+                # El procesamiento corre en su propio hilo; la interfaz solo muestra resultados
+                self.worker = FrameWorker(self.process_frame, max_queue=1)
+                self.worker.frameProcessed.connect(self.updateVideoLabel)
+                self.worker.start()
+
+            if not self.capture_connected:
+                # DirectConnection: el frame se encola desde el hilo de captura sin pasar por la interfaz
+                self.camera_capture.frameCaptured.connect(self.worker.submit, Qt.DirectConnection)
+                self.capture_connected = True
+
             self.camera_capture.start_capture()
             self.play_btn.setEnabled(False)
             self.pause_btn.setEnabled(True)
@@ -311,112 +349,74 @@ class PlateDetectorWidget(QWidget):
         """Detener"""
         if self.camera_capture:
             self.camera_capture.stop_capture()
+            if self.worker:
+                self.worker.queue.clear()
             self.play_btn.setEnabled(True)
             self.pause_btn.setEnabled(False)
             self.stop_btn.setEnabled(False)
+            self.display.clear()
             self.videoLabel.setText("Detenido")
 
+    def showEvent(self, event):
+        self.display_enabled = True
+        self.display.set_enabled(True)
+        super().showEvent(event)
+
+    def hideEvent(self, event):
+        self.display_enabled = False
+        self.display.set_enabled(False)
+        super().hideEvent(event)
+
+    def shutdown(self):
+        """Detener captura e hilo de procesamiento antes de destruir el widget"""
+        if self.camera_capture:
+            self.camera_capture.stop_capture()
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
+
     def clear_history(self):
         """Limpiar historial"""
         self.detected_plates = set()
         self.detection_count = 0
         self.plate_text_label.setText("---")
         self.total_label.setText("Total detectadas: 0")
-        self.tracked_vehicles = {}
-        self.next_vehicle_id = 0
+        # El tracker y el estimador de velocidad se usan en el hilo de trabajo: se limpian allí
+        self.reset_requested = True
         self.last_speed = 0
         self.speed_label.setText("0")
         self.last_detection_time = 0
-        self.frames_since_detection = 0
-
-    def calculate_speed(self, detections):
-        """Calcular velocidad de vehículos detectados"""
-        current_time = time.time()
-        current_centroids = []
-
-        # Obtener centroides de detecciones actuales
-        for detection in detections:
-            ymin, xmin, ymax, xmax = detection['box']
-            centroid_x = (xmin + xmax) / 2
-            centroid_y = (ymin + ymax) / 2
-            current_centroids.append((centroid_x, centroid_y))
-
-        # Tracking simple: asociar con vehículos existentes
-        updated_vehicles = {}
-
-        for centroid in current_centroids:
-            # Buscar vehículo más cercano
-            min_distance = float('inf')
-            matched_id = None
-
-            for vehicle_id, data in self.tracked_vehicles.items():
-                if len(data['positions']) > 0:
-                    last_pos = data['positions'][-1]
-                    distance = np.sqrt((centroid[0] - last_pos[0])**2 + (centroid[1] - last_pos[1])**2)
-
-                    if distance < min_distance and distance < 100:  # Max 100 pixels de movimiento
-                        min_distance = distance
-                        matched_id = vehicle_id
-
-            # Si encontramos match, actualizar
-            if matched_id is not None:
-                vehicle_data = self.tracked_vehicles[matched_id]
-                vehicle_data['positions'].append((centroid[0], centroid[1], current_time))
-
-                # Mantener solo últimas 10 posiciones
-                if len(vehicle_data['positions']) > 10:
-                    vehicle_data['positions'] = vehicle_data['positions'][-10:]
-
-                # Calcular velocidad si tenemos suficientes puntos
-                if len(vehicle_data['positions']) >= 3:
-                    positions = vehicle_data['positions']
-                    first_pos = positions[0]
-                    last_pos = positions[-1]
-
-                    # Distancia en pixels
-                    pixel_distance = np.sqrt(
-                        (last_pos[0] - first_pos[0])**2 +
-                        (last_pos[1] - first_pos[1])**2
-                    )
-
-                    # Tiempo en segundos
-                    time_diff = last_pos[2] - first_pos[2]
-
-                    if time_diff > 0 and pixel_distance > 5:  # Mínimo movimiento
-                        # Convertir a metros
-                        meters = pixel_distance / self.pixels_per_meter
-
-                        # Velocidad en m/s
-                        speed_ms = meters / time_diff
-
-                        # Convertir a km/h
-                        speed_kmh = speed_ms * 3.6
-
-                        # Limitar valores razonables (0-200 km/h)
-                        if 0 < speed_kmh < 200:
-                            vehicle_data['speed'] = speed_kmh
-                            self.last_speed = int(speed_kmh)
-
-                updated_vehicles[matched_id] = vehicle_data
-            else:
-                # Nuevo vehículo
-                new_id = self.next_vehicle_id
-                self.next_vehicle_id += 1
-                updated_vehicles[new_id] = {
-                    'positions': [(centroid[0], centroid[1], current_time)],
-                    'speed': 0
-                }
+        self.plate_cache.clear()
+
+    def calculate_speed(self, detections, speed_estimator, frame_time):
+        """Seguir los vehículos y calcular su velocidad. Devuelve el id de vehículo de cada detección"""
+        # Centroides (x, y) de las detecciones actuales; cajas en (ymin, xmin, ymax, xmax)
+        boxes = detections['box']
+        centroids = ((boxes[:, [1, 0]] + boxes[:, [3, 2]]) / 2).astype(np.float32)
+        class_ids = np.zeros(len(boxes), dtype=np.int32)
 
-        self.tracked_vehicles = updated_vehicles
+        self.tracker.predict()
+        det_slots, _ = self.tracker.update(centroids, boxes[:, [1, 0, 3, 2]].astype(np.int32), class_ids)
+        tracks = self.tracker.tracks
+        track_ids = tracks.object_id[det_slots].tolist()
 
-        # Actualizar UI con la velocidad más reciente
-        if self.last_speed > 0:
-            self.speed_label.setText(str(self.last_speed))
+        # Velocidad con las posiciones medidas y el tiempo del frame (no el del procesamiento)
+        speeds = speed_estimator.update(track_ids, centroids, frame_time)
+        if speeds:
+            self.last_speed = int(list(speeds.values())[-1])
+        speed_estimator.forget(tracks.object_id[tracks.active_slots()].tolist())
+
+        return track_ids
+
+    def update_speed_label(self, speed):
+        """Actualizar UI con la velocidad más reciente"""
+        if speed > 0:
+            self.speed_label.setText(str(speed))
 
             # Cambiar color según velocidad
-            if self.last_speed < 60:
+            if speed < 60:
                 color = "#00ff00"  # Verde
-            elif self.last_speed < 100:
+            elif speed < 100:
                 color = "#ffaa00"  # Naranja
             else:
                 color = "#ff0000"  # Rojo
@@ -430,55 +430,90 @@ class PlateDetectorWidget(QWidget):
                 min-height: 40px;
             """)
 
-    def updateVideoLabel(self, frame):
-        """Procesar frame"""
-        result = self.detector.detect(frame)
-        frame = result[0]
-        detections = result[3] if len(result) > 3 else []  # Obtener detecciones
+    def process_frame(self, frame, index, captured_at):
+        """Procesar frame en el hilo de trabajo (sin tocar la interfaz)"""
+        if self.reset_requested:
+            self.reset_requested = False
+            self.tracker.clear()
+            if self.speed_estimator:
+                self.speed_estimator.clear()
+
+        detections = self.detector.detect(frame)
 
         # Calcular velocidad
-        self.calculate_speed(detections)
+        speed_estimator = self.speed_estimator
+        if speed_estimator is None:
+            height, width = frame.shape[:2]
+            speed_estimator = load_speed_estimator(self.current_video_source, (width, height), self.pixels_per_meter)
+            self.speed_estimator = speed_estimator
+        track_ids = self.calculate_speed(detections, speed_estimator, self.frame_clock.time(index, captured_at))
+
+        # Placas con confianza > 90% de vehículos sin placa decidida: se leen en el pool, el video sigue
+        self.plate_cache.touch(track_ids)
+        if self.detector.should_save(detections):
+            self.submit_plate_rois(frame, detections, track_ids)
+
+        # Dibujar solo si el video se está mostrando (la placa se lee de la copia limpia)
+        if self.display_enabled:
+            self.detector.annotate(frame, detections)
+
+        # Detecciones (DETECTION_DTYPE) y vehículo seguido de cada una, hacia la interfaz por frameProcessed
+        return frame, {'detections': detections, 'track_ids': track_ids, 'speed': self.last_speed}
+
+    def submit_plate_rois(self, frame, detections, track_ids):
+        """Enviar al pool un recorte por placa (de las cajas TFLite, sobre el frame limpio)"""
+        captured = time.time()
+        for i in np.flatnonzero(detections['score'] > self.detector.save_confidence).tolist():
+            if not self.plate_cache.request_read(track_ids[i]):
+                continue  # Placa ya decidida o lectura en curso
+            box = detections['box'][i]
+            score = float(detections['score'][i])
+            # Copia: el frame se anota antes de que el recorte llegue al proceso
+            roi = crop_roi(frame, box)[0].copy()
+            ymin, xmin, ymax, xmax = box.tolist()
+            context = {'confidence': score, 'bbox': (xmin, ymin, xmax, ymax), 'image': roi}
+            accepted = self.plate_reader.submit(roi, self.plateRead.emit, timestamp=captured,
+                                                track_id=track_ids[i], context=context,
+                                                refine=score < SKIP_REFINE_SCORE)
+            if not accepted:
+                self.plate_cache.cancel_read(track_ids[i])
+                break
+
+    def on_plate_read(self, result):
+        """Sumar la lectura del pool a la votación del vehículo (hilo de la interfaz)"""
+        track_id = result['track_id']
+        if result['error'] is not None:
+            self.plate_cache.add_read(track_id, None, 0.0)  # Cuenta como intento fallido
+            return
+
+        plate_text = result['plate']
+        if not plate_text or plate_text.strip() == "":
+            print(f"⚠️ No se pudo leer texto de placa (OCR falló)")
+        context = result['context']
+        plate_text = self.plate_cache.add_read(track_id, plate_text, context['confidence'])
+        if plate_text is None:
+            return  # Todavía sin acuerdo entre lecturas
+
+        self.plate_text_label.setText(plate_text)
+
+        # Solo contar si es una placa nueva (única)
+        if plate_text in self.detected_plates:
+            return
+
+        self.detected_plates.add(plate_text)
+        self.last_detection_time = time.time()
+        self.total_label.setText(f"Total detectadas: {len(self.detected_plates)}")
+
+        image_path = self.captures.save(context['image'], result['timestamp'])
+        self.writer.record_plate(plate_text, context['confidence'], context['bbox'],
+                                 source=self.current_video_source, timestamp=result['timestamp'],
+                                 image_path=image_path)
+        print(f"✅ Placa detectada: {plate_text} | Vehículo {track_id} | Total únicas: {len(self.detected_plates)} | "
+              f"Velocidad: {self.last_speed} km/h | OCR: {result['ocr_ms']:.0f} ms")
+
+    def updateVideoLabel(self, frame, result):
+        """Mostrar frame procesado y actualizar paneles"""
+        self.update_speed_label(result['speed'])
 
         # Mostrar video
-        height, width, channels = frame.shape
-        bytes_per_line = channels * width
-        p = QImage(frame.data, width, height, bytes_per_line, QImage.Format_RGB888)
-        pixmap = QPixmap.fromImage(p)
-        self.videoLabel.setPixmap(pixmap.scaled(self.videoLabel.size(), Qt.KeepAspectRatio, Qt.SmoothTransformation))
-
-        # Incrementar contador de frames desde última detección
-        self.frames_since_detection += 1
-
-        # Detectar placa con confianza > 90% Y con cooldown
-        if result[1] and self.frames_since_detection >= self.cooldown_frames:  # Alta confianza (> 90%) + cooldown
-            try:
-                # Intentar leer la placa
-                plate_text = Plate(result[0]).get()
-
-                # SOLO procesar si la placa tiene formato válido (ABC-1234)
-                if plate_text and plate_text.strip() != "":
-                    # Validar formato usando la función de util
-                    from lib.util import license_complies_format
-
-                    if license_complies_format(plate_text):
-                        # Solo contar si es una placa nueva (única)
-                        if plate_text not in self.detected_plates:
-                            self.detected_plates.add(plate_text)
-                            self.plate_text_label.setText(plate_text)
-                            self.total_label.setText(f"Total detectadas: {len(self.detected_plates)}")
-
-                            # Resetear cooldown
-                            self.frames_since_detection = 0
-                            self.last_detection_time = time.time()
-
-                            print(f"✅ Placa detectada: {plate_text} | Total únicas: {len(self.detected_plates)} | Velocidad: {self.last_speed} km/h")
-                        else:
-                            # Si ya existe, solo actualizar display pero NO resetear cooldown
-                            self.plate_text_label.setText(plate_text)
-                    else:
-                        print(f"⚠️ Placa rechazada (formato inválido): {plate_text}")
-                else:
-                    print(f"⚠️ No se pudo leer texto de placa (OCR falló)")
-
-            except Exception as e:
-                print(f"❌ Error detectando placa: {e}")
+        self.display.submit(frame)
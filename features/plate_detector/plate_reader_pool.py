@@ -0,0 +1,138 @@
+import time
+import atexit
+import threading
+import traceback
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor
+
+
+def _init_worker():
+    """Cargar el modelo de placas y el OCR al iniciar cada proceso"""
+    from lib.model_registry import registry
+    import features.plate_detector.plate  # Registra 'license_plate_yolo'
+    registry.get('license_plate_yolo')
+
+
+def read_plate_job(image, refine=True):
+    """Leer la placa de un recorte (se ejecuta en un proceso del pool).
+
+    Devuelve (texto, formato válido, ms de lectura).
+    """
+    from features.plate_detector.plate import read_roi
+    from lib.util import license_complies_format
+
+    start = time.perf_counter()
+    plate_text = read_roi(image, refine)
+    valid = bool(plate_text) and license_complies_format(plate_text)
+    return plate_text, valid, (time.perf_counter() - start) * 1000
+
+
+class PlateReaderPool:
+    """Lectura de placas (YOLO + OCR) en un pool de procesos.
+
+    Cada trabajo lleva el recorte de la placa, el instante de captura y el id del
+    vehículo seguido; el resultado llega por callback desde un hilo del
+    pool (en Qt, emitir una señal desde el callback). Como mucho
+    max_pending trabajos en curso: si el pool está ocupado, submit()
+    rechaza el trabajo en lugar de acumular atraso.
+    """
+
+    def __init__(self, max_workers=2, max_pending=None):
+        self.max_workers = max_workers
+        self.max_pending = max_pending or max_workers * 2
+        # spawn: los procesos no heredan el estado de Qt/torch del proceso principal
+        self.executor = ProcessPoolExecutor(max_workers=max_workers, initializer=_init_worker,
+                                            mp_context=multiprocessing.get_context('spawn'))
+        self._lock = threading.Lock()
+        self._pending = 0
+        self.submitted = 0
+        self.rejected = 0
+        self.completed = 0
+        self.failed = 0
+
+    @property
+    def busy(self):
+        return self._pending >= self.max_pending
+
+    def submit(self, image, callback, timestamp=None, track_id=None, context=None, refine=True):
+        """Encolar lectura. Devuelve False si ya hay max_pending trabajos en curso.
+
+        image debe ser una copia propia: se envía al proceso después de volver.
+        Con refine=False no se ajusta la caja con YOLO.
+
+        callback recibe un diccionario con plate, valid, timestamp,
+        track_id, context, ocr_ms y error.
+        """
+        with self._lock:
+            if self._pending >= self.max_pending:
+                self.rejected += 1
+                return False
+            self._pending += 1
+            self.submitted += 1
+
+        job = {
+            'timestamp': timestamp if timestamp is not None else time.time(),
+            'track_id': track_id,
+            'context': context,
+        }
+        try:
+            future = self.executor.submit(read_plate_job, image, refine)
+        except RuntimeError as e:
+            # El pool ya se cerró
+            with self._lock:
+                self._pending -= 1
+            print(f"⚠️ Pool de placas no disponible: {e}")
+            return False
+
+        future.add_done_callback(lambda done: self._finish(job, done, callback))
+        return True
+
+    def _finish(self, job, future, callback):
+        with self._lock:
+            self._pending -= 1
+
+        result = dict(job, plate=None, valid=False, ocr_ms=0.0, error=None)
+        if future.cancelled():
+            return
+        try:
+            result['plate'], result['valid'], result['ocr_ms'] = future.result()
+            self.completed += 1
+        except Exception as e:
+            self.failed += 1
+            result['error'] = str(e)
+            print(f"❌ Error leyendo placa: {e}")
+
+        try:
+            callback(result)
+        except Exception:
+            traceback.print_exc()
+
+    def shutdown(self, wait=False):
+        """Cerrar el pool descartando los trabajos que no empezaron"""
+        self.executor.shutdown(wait=wait, cancel_futures=True)
+
+    def stats(self):
+        return {'pending': self._pending, 'submitted': self.submitted, 'rejected': self.rejected,
+                'completed': self.completed, 'failed': self.failed}
+
+
+_pool = None
+_pool_lock = threading.Lock()
+
+
+def plate_reader_pool(max_workers=2):
+    """Pool compartido por todo el proceso (los procesos se crean una sola vez)"""
+    global _pool
+    with _pool_lock:
+        if _pool is None:
+            _pool = PlateReaderPool(max_workers=max_workers)
+        return _pool
+
+
+@atexit.register
+def shutdown_pool():
+    global _pool
+    with _pool_lock:
+        if _pool is not None:
+            _pool.shutdown()
+            _pool = None
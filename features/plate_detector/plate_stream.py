@@ -0,0 +1,69 @@
+import numpy as np
+from features.plate_detector.detector import Detector  # Registra 'plate_detector'
+from features.plate_detector.plate import crop_roi, read_roi, SKIP_REFINE_SCORE
+from lib.model_registry import registry
+from lib.util import license_complies_format
+
+
+class PlateStreamState:
+    """Estado de lectura de placas de un stream: cooldown y placas únicas"""
+
+    def __init__(self, cooldown_frames=60, storage=None):
+        self.cooldown_frames = cooldown_frames
+        self.storage = storage  # CaptureStorage opcional para guardar los recortes de placas nuevas
+        self.frames_since_detection = cooldown_frames
+        self.unique_plates = set()
+
+    def update(self, frame, detections, detector):
+        """Leer las placas con alta confianza (si pasó el cooldown) desde sus recortes.
+
+        Devuelve una lista de eventos {'plate', 'new', 'confidence', 'x1'..'y2'},
+        uno por placa leída con formato válido.
+        """
+        self.frames_since_detection += 1
+        if not detector.should_save(detections) or self.frames_since_detection < self.cooldown_frames:
+            return []
+
+        events = []
+        for i in np.flatnonzero(detections['score'] > detector.save_confidence).tolist():
+            score = float(detections['score'][i])
+            roi, _ = crop_roi(frame, detections['box'][i])
+            try:
+                plate_text = read_roi(roi, refine=score < SKIP_REFINE_SCORE)
+            except Exception as e:
+                print(f"❌ Error detectando placa: {e}")
+                continue
+
+            if not plate_text or not license_complies_format(plate_text):
+                continue
+
+            is_new = plate_text not in self.unique_plates
+            if is_new:
+                self.unique_plates.add(plate_text)
+                self.frames_since_detection = 0
+
+            ymin, xmin, ymax, xmax = (int(value) for value in detections['box'][i].tolist())
+            event = {'plate': plate_text, 'new': is_new, 'confidence': round(score, 4),
+                     'x1': xmin, 'y1': ymin, 'x2': xmax, 'y2': ymax}
+            if is_new and self.storage is not None:
+                event['image_path'] = self.storage.save(roi.copy())
+            events.append(event)
+        return events
+
+
+class PlatePipeline:
+    """Placas para StreamEngine: un Detector compartido y un PlateStreamState por stream"""
+
+    def __init__(self, cooldown_frames=60, detector=None, storage=None):
+        self.cooldown_frames = cooldown_frames
+        self.storage = storage
+        self.detector = detector if detector is not None else registry.get('plate_detector')
+
+    def create_state(self, name):
+        return PlateStreamState(self.cooldown_frames, self.storage)
+
+    def infer_batch(self, states, frames):
+        return self.detector.detect_batch(frames)
+
+    def step(self, state, frame, detections):
+        return state.update(frame, detections, self.detector)
@@ -0,0 +1,134 @@
+from lib.database_manager import DatabaseManager, DB_PATH
+from lib.statistics_rollup import StatisticsRollup
+
+# Índices para recorrer rangos de tiempo, filtrar por fuente y buscar placas
+# sin escanear la tabla. Con (source, timestamp) la página de una fuente se
+# lee directamente del índice en orden de tiempo.
+INDEXES = (
+    "CREATE INDEX IF NOT EXISTS idx_vehicle_detections_timestamp ON vehicle_detections (timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_vehicle_detections_source_timestamp ON vehicle_detections (source, timestamp)",
+    "CREATE INDEX IF NOT EXISTS idx_vehicle_detections_license_plate ON vehicle_detections (license_plate)",
+    "CREATE INDEX IF NOT EXISTS idx_zone_counts_timestamp ON zone_counts (timestamp, zone_name, vehicle_count)",
+)
+
+DETECTION_COLUMNS = ('id', 'timestamp', 'detection_type', 'confidence', 'license_plate', 'vehicle_type', 'source')
+
+# Agrupación por período sobre las filas precalculadas de hourly_statistics
+ROLLUP_BUCKETS = {
+    'hour': "date || ' ' || printf('%02d', hour) || ':00'",
+    'day': "date",
+    'month': "substr(date, 1, 7)",
+}
+
+# La misma agrupación sobre detecciones crudas (cuando se filtra por fuente)
+RAW_BUCKETS = {
+    'hour': "strftime('%Y-%m-%d %H:00', timestamp)",
+    'day': "substr(timestamp, 1, 10)",
+    'month': "substr(timestamp, 1, 7)",
+}
+
+
+class StatisticsQueries:
+    """Consultas de historial sobre vehicle_detections y zone_counts.
+
+    Todas las consultas trabajan sobre rangos de tiempo indexados:
+    las páginas usan paginación por clave (timestamp, id) en lugar de
+    OFFSET y los agregados sin filtro de fuente se leen de las filas por
+    hora precalculadas. Pensado para ejecutarse fuera del hilo de la interfaz.
+    """
+
+    def __init__(self, db_path=DB_PATH):
+        self.database = DatabaseManager(db_path)
+        self._indexes_ready = False
+
+    def ensure_indexes(self):
+        """Crear los índices (y la tabla por hora) si todavía no existen"""
+        if self._indexes_ready:
+            return
+        connection = self.database.connect()
+        try:
+            with connection:
+                for statement in INDEXES:
+                    connection.execute(statement)
+                StatisticsRollup.ensure_schema(connection)
+        finally:
+            connection.close()
+        self._indexes_ready = True
+
+    def _query(self, sql, params):
+        self.ensure_indexes()
+        connection = self.database.connect()
+        try:
+            return connection.execute(sql, params).fetchall()
+        finally:
+            connection.close()
+
+    def sources(self):
+        """Fuentes con detecciones registradas"""
+        rows = self._query("SELECT DISTINCT source FROM vehicle_detections WHERE source IS NOT NULL ORDER BY source", ())
+        return [row[0] for row in rows]
+
+    def detections_page(self, start, end, source=None, plate=None, after=None, limit=100):
+        """Una página de detecciones entre start y end, de la más reciente a la más antigua.
+
+        after es la clave (timestamp, id) de la última fila de la página
+        anterior (None para la primera). Devuelve (filas, clave siguiente),
+        con clave None si no hay más páginas.
+        """
+        conditions = ["timestamp >= ?", "timestamp < ?"]
+        params = [start, end]
+        if source:
+            conditions.append("source = ?")
+            params.append(source)
+        if plate:
+            conditions.append("license_plate = ?")
+            params.append(plate.strip().upper())
+        if after is not None:
+            conditions.append("(timestamp < ? OR (timestamp = ? AND id < ?))")
+            params.extend([after[0], after[0], after[1]])
+
+        sql = (f"SELECT {', '.join(DETECTION_COLUMNS)} FROM vehicle_detections "
+               f"WHERE {' AND '.join(conditions)} ORDER BY timestamp DESC, id DESC LIMIT ?")
+        rows = self._query(sql, params + [limit + 1])
+
+        next_key = None
+        if len(rows) > limit:
+            rows = rows[:limit]
+            next_key = (rows[-1][1], rows[-1][0])
+        return [dict(zip(DETECTION_COLUMNS, row)) for row in rows], next_key
+
+    def detection_series(self, start, end, bucket='hour', source=None):
+        """Vehículos, placas y detecciones por período entre start y end"""
+        if bucket not in ROLLUP_BUCKETS:
+            raise ValueError(f"Período desconocido: {bucket}")
+
+        if source:
+            sql = (f"SELECT {RAW_BUCKETS[bucket]} AS bucket, "
+                   f"SUM(detection_type = 'vehicle'), SUM(detection_type = 'plate'), COUNT(*) "
+                   f"FROM vehicle_detections WHERE source = ? AND timestamp >= ? AND timestamp < ? "
+                   f"GROUP BY bucket ORDER BY bucket")
+            rows = self._query(sql, (source, start, end))
+        else:
+            # Una fila por hora (no por detección); el rango de fechas usa la clave primaria
+            start_date, start_hour = start[:10], int(start[11:13] or 0)
+            end_date, end_hour = end[:10], int(end[11:13] or 0)
+            sql = (f"SELECT {ROLLUP_BUCKETS[bucket]} AS bucket, "
+                   f"SUM(total_vehicles), SUM(plates_detected), SUM(total_detections) "
+                   f"FROM hourly_statistics "
+                   f"WHERE date >= ? AND date <= ? AND (date > ? OR hour >= ?) AND (date < ? OR hour < ?) "
+                   f"GROUP BY bucket ORDER BY bucket")
+            rows = self._query(sql, (start_date, end_date, start_date, start_hour, end_date, end_hour))
+
+        return [{'bucket': bucket_key, 'vehicles': vehicles or 0, 'plates': plates or 0, 'detections': total or 0}
+                for bucket_key, vehicles, plates, total in rows]
+
+    def zone_series(self, start, end, bucket='hour'):
+        """Conteos por línea/zona y período entre start y end"""
+        if bucket not in RAW_BUCKETS:
+            raise ValueError(f"Período desconocido: {bucket}")
+
+        sql = (f"SELECT {RAW_BUCKETS[bucket]} AS bucket, zone_name, SUM(vehicle_count) "
+               f"FROM zone_counts WHERE timestamp >= ? AND timestamp < ? "
+               f"GROUP BY bucket, zone_name ORDER BY bucket, zone_name")
+        return [{'bucket': bucket_key, 'zone_name': zone_name, 'vehicles': vehicles or 0}
+                for bucket_key, zone_name, vehicles in self._query(sql, (start, end))]
@@ -0,0 +1,310 @@
+import queue
+import traceback
+from PyQt5.QtWidgets import (QWidget, QVBoxLayout, QHBoxLayout, QLabel, QPushButton, QGroupBox,
+                             QComboBox, QLineEdit, QDateEdit, QTableWidget, QTableWidgetItem,
+                             QScrollBar, QHeaderView, QSplitter, QTabWidget)
+from PyQt5.QtCore import Qt, QDate, QThread, pyqtSignal
+from matplotlib.figure import Figure
+from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg
+
+from features.statistics.statistics_queries import StatisticsQueries, DETECTION_COLUMNS
+
+
+class QueryWorker(QThread):
+    """Ejecuta consultas a la base de datos fuera del hilo de la interfaz.
+
+    Cada consulta lleva una etiqueta; si llega una consulta nueva con la
+    misma etiqueta antes de terminar la anterior, el resultado viejo se
+    descarta (sólo interesa lo último que pidió el usuario).
+    """
+
+    # (etiqueta, resultado)
+    resultReady = pyqtSignal(str, object)
+    queryError = pyqtSignal(str, str)
+
+    def __init__(self, parent=None):
+        super().__init__(parent)
+        self.queue = queue.Queue()
+        self._generation = {}
+        self._running = False
+
+    def submit(self, tag, fn, *args, **kwargs):
+        generation = self._generation.get(tag, 0) + 1
+        self._generation[tag] = generation
+        self.queue.put((tag, generation, fn, args, kwargs))
+
+    def run(self):
+        self._running = True
+        while self._running:
+            try:
+                tag, generation, fn, args, kwargs = self.queue.get(timeout=0.1)
+            except queue.Empty:
+                continue
+            if generation != self._generation.get(tag):
+                continue
+
+            try:
+                result = fn(*args, **kwargs)
+            except Exception as e:
+                traceback.print_exc()
+                self.queryError.emit(tag, str(e))
+                continue
+
+            if generation == self._generation.get(tag):
+                self.resultReady.emit(tag, result)
+
+    def stop(self):
+        """Detener el hilo y esperar a que termine"""
+        self._running = False
+        self.wait()
+
+
+class StatisticsWidget(QWidget):
+    """Historial de detecciones y conteos con gráfico por período.
+
+    El gráfico dibuja sólo la ventana visible de períodos (se recorre con
+    la barra de desplazamiento) y la tabla se carga por páginas.
+    """
+
+    PAGE_SIZE = 100
+    CHART_WINDOW = 48  # Períodos visibles en el gráfico
+    BUCKETS = {"Hora": 'hour', "Día": 'day', "Mes": 'month'}
+
+    def __init__(self):
+        super().__init__()
+        self.queries = StatisticsQueries()
+        self.series = []
+        self.page_keys = [None]  # Clave de inicio de cada página visitada
+        self.next_key = None
+
+        self.worker = QueryWorker()
+        self.worker.resultReady.connect(self.on_result)
+        self.worker.queryError.connect(self.on_error)
+        self.worker.start()
+
+        self.initUI()
+        self.worker.submit('sources', self.queries.sources)
+        self.refresh()
+
+    def initUI(self):
+        """Inicializar interfaz de usuario"""
+        main_layout = QVBoxLayout(self)
+
+        # === Filtros ===
+        filters_group = QGroupBox("Filtros")
+        filters_group.setStyleSheet("QGroupBox { font-weight: bold; font-size: 13px; padding: 8px; }")
+        filters_layout = QHBoxLayout()
+
+        today = QDate.currentDate()
+        self.start_date_edit = QDateEdit(today.addDays(-6))
+        self.start_date_edit.setCalendarPopup(True)
+        self.start_date_edit.setDisplayFormat("yyyy-MM-dd")
+        self.end_date_edit = QDateEdit(today)
+        self.end_date_edit.setCalendarPopup(True)
+        self.end_date_edit.setDisplayFormat("yyyy-MM-dd")
+        filters_layout.addWidget(QLabel("Desde:"))
+        filters_layout.addWidget(self.start_date_edit)
+        filters_layout.addWidget(QLabel("Hasta:"))
+        filters_layout.addWidget(self.end_date_edit)
+
+        self.bucket_combo = QComboBox()
+        self.bucket_combo.addItems(list(self.BUCKETS.keys()))
+        filters_layout.addWidget(QLabel("Período:"))
+        filters_layout.addWidget(self.bucket_combo)
+
+        self.source_combo = QComboBox()
+        self.source_combo.addItem("Todas")
+        self.source_combo.setMinimumWidth(180)
+        filters_layout.addWidget(QLabel("Fuente:"))
+        filters_layout.addWidget(self.source_combo)
+
+        self.plate_edit = QLineEdit()
+        self.plate_edit.setPlaceholderText("ABC-1234")
+        self.plate_edit.setMaximumWidth(110)
+        filters_layout.addWidget(QLabel("Placa:"))
+        filters_layout.addWidget(self.plate_edit)
+
+        search_btn = QPushButton("🔍 Consultar")
+        search_btn.clicked.connect(self.refresh)
+        filters_layout.addWidget(search_btn)
+
+        filters_group.setLayout(filters_layout)
+        main_layout.addWidget(filters_group)
+
+        splitter = QSplitter(Qt.Vertical)
+
+        # === Gráfico por período ===
+        chart_widget = QWidget()
+        chart_layout = QVBoxLayout(chart_widget)
+        chart_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.summary_label = QLabel("")
+        self.summary_label.setStyleSheet("font-size: 13px; font-weight: bold; padding: 4px;")
+        chart_layout.addWidget(self.summary_label)
+
+        self.figure = Figure(figsize=(8, 3), tight_layout=True)
+        self.axes = self.figure.add_subplot(111)
+        self.canvas = FigureCanvasQTAgg(self.figure)
+        chart_layout.addWidget(self.canvas)
+
+        self.chart_scroll = QScrollBar(Qt.Horizontal)
+        self.chart_scroll.setRange(0, 0)
+        self.chart_scroll.valueChanged.connect(self.draw_chart)
+        chart_layout.addWidget(self.chart_scroll)
+        splitter.addWidget(chart_widget)
+
+        # === Tabla de detecciones ===
+        table_widget = QWidget()
+        table_layout = QVBoxLayout(table_widget)
+        table_layout.setContentsMargins(0, 0, 0, 0)
+
+        self.table = QTableWidget(0, len(DETECTION_COLUMNS))
+        self.table.setHorizontalHeaderLabels(["ID", "Fecha/Hora", "Tipo", "Confianza", "Placa", "Vehículo", "Fuente"])
+        self.table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.table.setEditTriggers(QTableWidget.NoEditTriggers)
+        table_layout.addWidget(self.table)
+
+        pages_layout = QHBoxLayout()
+        self.prev_btn = QPushButton("◀ Más recientes")
+        self.prev_btn.setEnabled(False)
+        self.prev_btn.clicked.connect(self.previous_page)
+        self.next_btn = QPushButton("Más antiguas ▶")
+        self.next_btn.setEnabled(False)
+        self.next_btn.clicked.connect(self.next_page)
+        self.page_label = QLabel("")
+        pages_layout.addWidget(self.prev_btn)
+        pages_layout.addStretch()
+        pages_layout.addWidget(self.page_label)
+        pages_layout.addStretch()
+        pages_layout.addWidget(self.next_btn)
+        table_layout.addLayout(pages_layout)
+
+        # === Conteos por línea/zona (zone_counts): una fila por período, una columna por línea o zona ===
+        self.zone_table = QTableWidget(0, 1)
+        self.zone_table.setHorizontalHeaderLabels(["Período"])
+        self.zone_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
+        self.zone_table.setEditTriggers(QTableWidget.NoEditTriggers)
+
+        tabs = QTabWidget()
+        tabs.addTab(table_widget, "Detecciones")
+        tabs.addTab(self.zone_table, "Líneas y zonas")
+        splitter.addWidget(tabs)
+
+        main_layout.addWidget(splitter)
+
+    def filters(self):
+        """Rango [inicio, fin) y filtros seleccionados"""
+        start = self.start_date_edit.date().toString("yyyy-MM-dd") + " 00:00:00"
+        end = self.end_date_edit.date().addDays(1).toString("yyyy-MM-dd") + " 00:00:00"
+        source = self.source_combo.currentText() if self.source_combo.currentIndex() > 0 else None
+        plate = self.plate_edit.text().strip() or None
+        return start, end, source, plate
+
+    def refresh(self):
+        """Consultar agregados y la primera página con los filtros actuales"""
+        start, end, source, _ = self.filters()
+        bucket = self.BUCKETS[self.bucket_combo.currentText()]
+        self.summary_label.setText("Consultando...")
+        self.worker.submit('series', self.queries.detection_series, start, end, bucket, source)
+        self.worker.submit('zones', self.queries.zone_series, start, end, bucket)
+        self.page_keys = [None]
+        self.load_page()
+
+    def load_page(self):
+        start, end, source, plate = self.filters()
+        self.prev_btn.setEnabled(False)
+        self.next_btn.setEnabled(False)
+        self.worker.submit('page', self.queries.detections_page, start, end, source, plate,
+                           self.page_keys[-1], self.PAGE_SIZE)
+
+    def next_page(self):
+        if self.next_key is not None:
+            self.page_keys.append(self.next_key)
+            self.load_page()
+
+    def previous_page(self):
+        if len(self.page_keys) > 1:
+            self.page_keys.pop()
+            self.load_page()
+
+    def on_result(self, tag, result):
+        """Resultados de consultas (hilo de la interfaz)"""
+        if tag == 'sources':
+            self.source_combo.addItems(result)
+        elif tag == 'series':
+            self.series = result
+            vehicles = sum(item['vehicles'] for item in result)
+            plates = sum(item['plates'] for item in result)
+            self.summary_label.setText(f"🚗 Vehículos: {vehicles}    🔢 Placas: {plates}    📅 Períodos: {len(result)}")
+
+            # Mostrar los períodos más recientes
+            maximum = max(0, len(result) - self.CHART_WINDOW)
+            self.chart_scroll.blockSignals(True)
+            self.chart_scroll.setRange(0, maximum)
+            self.chart_scroll.setPageStep(self.CHART_WINDOW)
+            self.chart_scroll.setValue(maximum)
+            self.chart_scroll.blockSignals(False)
+            self.draw_chart()
+        elif tag == 'zones':
+            self.fill_zone_table(result)
+        elif tag == 'page':
+            rows, self.next_key = result
+            self.fill_table(rows)
+            self.page_label.setText(f"Página {len(self.page_keys)}")
+            self.prev_btn.setEnabled(len(self.page_keys) > 1)
+            self.next_btn.setEnabled(self.next_key is not None)
+
+    def on_error(self, tag, message):
+        print(f"❌ Error en consulta '{tag}': {message}")
+        self.summary_label.setText(f"⚠️ Error consultando estadísticas: {message}")
+
+    def draw_chart(self):
+        """Dibujar sólo los períodos de la ventana visible"""
+        first = self.chart_scroll.value()
+        window = self.series[first:first + self.CHART_WINDOW]
+
+        self.axes.clear()
+        if window:
+            positions = range(len(window))
+            self.axes.bar([x - 0.2 for x in positions], [item['vehicles'] for item in window], width=0.4,
+                          color='#2e86de', label="Vehículos")
+            self.axes.bar([x + 0.2 for x in positions], [item['plates'] for item in window], width=0.4,
+                          color='#10ac84', label="Placas")
+            step = max(1, len(window) // 12)
+            self.axes.set_xticks(list(positions)[::step])
+            self.axes.set_xticklabels([item['bucket'] for item in window][::step], rotation=30, ha='right',
+                                      fontsize=8)
+            self.axes.legend(loc='upper left', fontsize=8)
+        else:
+            self.axes.text(0.5, 0.5, "Sin datos en el rango seleccionado", ha='center', va='center',
+                           transform=self.axes.transAxes)
+        self.canvas.draw_idle()
+
+    def fill_table(self, rows):
+        self.table.setRowCount(len(rows))
+        for row_index, row in enumerate(rows):
+            for column_index, column in enumerate(DETECTION_COLUMNS):
+                value = row[column]
+                if column == 'confidence' and value is not None:
+                    value = f"{value:.2f}"
+                self.table.setItem(row_index, column_index, QTableWidgetItem("" if value is None else str(value)))
+
+    def fill_zone_table(self, series):
+        """Vehículos por período (más recientes primero) y línea/zona"""
+        zones = sorted({item['zone_name'] for item in series})
+        counts = {(item['bucket'], item['zone_name']): item['vehicles'] for item in series}
+        buckets = sorted({item['bucket'] for item in series}, reverse=True)
+
+        self.zone_table.setColumnCount(len(zones) + 1)
+        self.zone_table.setHorizontalHeaderLabels(["Período"] + zones)
+        self.zone_table.setRowCount(len(buckets))
+        for row_index, bucket in enumerate(buckets):
+            self.zone_table.setItem(row_index, 0, QTableWidgetItem(str(bucket)))
+            for column_index, zone in enumerate(zones, start=1):
+                self.zone_table.setItem(row_index, column_index, QTableWidgetItem(str(counts.get((bucket, zone), 0))))
+
+    def shutdown(self):
+        """Detener el hilo de consultas antes de destruir el widget"""
+        if self.worker:
+            self.worker.stop()
+            self.worker = None
@@ -0,0 +1,67 @@
+import cv2
+import numpy as np
+
+
+class Annotator:
+    """Dibuja cajas, etiquetas y líneas sobre un frame.
+
+    La detección y el tracking no dibujan: devuelven resultados y el que
+    consume el frame (pantalla o video de salida) decide si anotarlo.
+    Con ``enabled = False`` todas las operaciones son no-op.
+    """
+
+    FONT = cv2.FONT_HERSHEY_SIMPLEX
+
+    def __init__(self, enabled=True, max_cached_labels=1024):
+        self.enabled = enabled
+        self.max_cached_labels = max_cached_labels
+        self._text_sizes = {}
+
+    def text_size(self, text, scale, thickness):
+        """Métricas del texto ((ancho, alto), baseline), cacheadas por etiqueta"""
+        key = (text, scale, thickness)
+        size = self._text_sizes.get(key)
+        if size is None:
+            if len(self._text_sizes) >= self.max_cached_labels:
+                self._text_sizes.clear()
+            size = cv2.getTextSize(text, self.FONT, scale, thickness)
+            self._text_sizes[key] = size
+        return size
+
+    def box(self, frame, bbox, color, thickness=2):
+        """Rectángulo (x1, y1, x2, y2)"""
+        if not self.enabled:
+            return
+        cv2.rectangle(frame, (int(bbox[0]), int(bbox[1])), (int(bbox[2]), int(bbox[3])), color, thickness)
+
+    def label(self, frame, text, x, y, background, color=(0, 0, 0), scale=0.6, thickness=2):
+        """Etiqueta con fondo, apoyada sobre la coordenada y (borde superior de la caja)"""
+        if not self.enabled:
+            return
+        (width, height), _ = self.text_size(text, scale, thickness)
+        x = int(x)
+        y = int(max(y, height + 10))  # No salir por el borde superior
+        cv2.rectangle(frame, (x, y - height - 10), (x + width, y), background, cv2.FILLED)
+        cv2.putText(frame, text, (x, y - 8), self.FONT, scale, color, thickness)
+
+    def text(self, frame, text, x, y, color, scale=0.7, thickness=2):
+        """Texto sin fondo"""
+        if not self.enabled:
+            return
+        cv2.putText(frame, text, (int(x), int(y)), self.FONT, scale, color, thickness)
+
+    def line(self, frame, p1, p2, color, thickness=3):
+        if not self.enabled:
+            return
+        cv2.line(frame, (int(p1[0]), int(p1[1])), (int(p2[0]), int(p2[1])), color, thickness)
+
+    def point(self, frame, center, color, radius=5):
+        if not self.enabled:
+            return
+        cv2.circle(frame, (int(center[0]), int(center[1])), radius, color, -1)
+
+    def polygon(self, frame, points, color, thickness=2):
+        if not self.enabled:
+            return
+        points = np.asarray(points, dtype=np.int32).reshape(-1, 1, 2)
+        cv2.polylines(frame, [points], True, color, thickness)
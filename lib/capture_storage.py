@@ -0,0 +1,175 @@
+import os
+import time
+import queue
+import atexit
+import hashlib
+import threading
+import traceback
+from datetime import datetime
+
+import cv2
+
+CAPTURE_DIR = "assets/images/capture"
+
+
+class CaptureStorage:
+    """Guarda capturas (recortes de placas) en segundo plano con retención.
+
+    save() sólo calcula el nombre y encola la imagen; un hilo propio la
+    codifica a JPEG y la escribe, así la inferencia nunca espera al disco.
+    Los archivos se nombran por el hash del contenido (una imagen repetida
+    se guarda una sola vez) dentro de carpetas por fecha AAAA/MM/DD. Cada
+    retention_interval segundos se borran las capturas más viejas que
+    max_age_days y, si el total supera max_bytes, las más antiguas.
+    """
+
+    def __init__(self, root=CAPTURE_DIR, jpeg_quality=85, max_bytes=2 * 1024 ** 3, max_age_days=30,
+                 max_queue=64, retention_interval=300):
+        self.root = root
+        self.jpeg_quality = jpeg_quality
+        self.max_bytes = max_bytes
+        self.max_age_days = max_age_days
+        self.retention_interval = retention_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.written = 0
+        self.dropped = 0
+        self.deleted = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="capture-storage", daemon=True)
+        self._thread.start()
+
+    def path_for(self, image, timestamp=None):
+        """Ruta de la captura: carpeta por fecha y nombre por hash del contenido"""
+        moment = datetime.fromtimestamp(timestamp) if timestamp is not None else datetime.now()
+        digest = hashlib.sha1(image.tobytes()).hexdigest()[:20]
+        return os.path.join(self.root, moment.strftime("%Y"), moment.strftime("%m"), moment.strftime("%d"),
+                            f"{digest}.jpg")
+
+    def save(self, image, timestamp=None):
+        """Encolar la imagen y devolver la ruta donde quedará (None si la cola está llena)"""
+        path = self.path_for(image, timestamp)
+        try:
+            self.queue.put_nowait((path, image))
+        except queue.Full:
+            self.dropped += 1
+            return None
+        return path
+
+    def _write(self, path, image):
+        if os.path.exists(path):
+            return  # Mismo contenido ya guardado
+        ok, encoded = cv2.imencode('.jpg', image, [cv2.IMWRITE_JPEG_QUALITY, self.jpeg_quality])
+        if not ok:
+            print(f"⚠️ No se pudo codificar la captura: {path}")
+            return
+
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        # Escribir en temporal y renombrar: nunca queda un JPEG a medias
+        temporary = f"{path}.tmp"
+        with open(temporary, 'wb') as file:
+            file.write(encoded.tobytes())
+        os.replace(temporary, path)
+        self.written += 1
+
+    def _run(self):
+        next_retention = time.monotonic()
+        while not (self._stop.is_set() and self.queue.empty()):
+            if time.monotonic() >= next_retention:
+                self.enforce_retention()
+                next_retention = time.monotonic() + self.retention_interval
+
+            try:
+                path, image = self.queue.get(timeout=0.5)
+            except queue.Empty:
+                continue
+            try:
+                self._write(path, image)
+            except OSError as e:
+                print(f"❌ Error guardando captura {path}: {e}")
+                traceback.print_exc()
+
+    def enforce_retention(self):
+        """Borrar capturas vencidas y, si se supera el tamaño máximo, las más antiguas"""
+        if not os.path.isdir(self.root):
+            return 0
+
+        files = []
+        for directory, _, names in os.walk(self.root):
+            for name in names:
+                if not name.endswith('.jpg'):
+                    continue
+                path = os.path.join(directory, name)
+                try:
+                    stat = os.stat(path)
+                except OSError:
+                    continue
+                files.append((stat.st_mtime, stat.st_size, path))
+        files.sort()
+
+        cutoff = time.time() - self.max_age_days * 86400
+        total = sum(size for _, size, _ in files)
+        deleted = 0
+        for mtime, size, path in files:
+            if mtime >= cutoff and total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except OSError:
+                continue
+            total -= size
+            deleted += 1
+
+        # Quitar carpetas de días que quedaron vacías
+        for directory, subdirectories, names in os.walk(self.root, topdown=False):
+            if directory != self.root and not subdirectories and not names:
+                try:
+                    os.rmdir(directory)
+                except OSError:
+                    pass
+
+        if deleted:
+            self.deleted += deleted
+            print(f"🧹 Capturas eliminadas por retención: {deleted}")
+        return deleted
+
+    def stop(self, timeout=5.0):
+        """Escribir lo pendiente y terminar el hilo"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        return {'written': self.written, 'dropped': self.dropped, 'deleted': self.deleted,
+                'queued': self.queue.qsize()}
+
+
+_storages = {}
+_storages_lock = threading.Lock()
+
+
+def capture_storage(root=CAPTURE_DIR):
+    """Almacenamiento compartido por todo el proceso para una carpeta (se inicia al pedirlo)"""
+    with _storages_lock:
+        storage = _storages.get(root)
+        if storage is None:
+            storage = CaptureStorage(root)
+            _storages[root] = storage
+        storage.start()
+        return storage
+
+
+@atexit.register
+def stop_storages():
+    """Guardar las capturas pendientes al salir"""
+    with _storages_lock:
+        storages = list(_storages.values())
+    for storage in storages:
+        storage.stop()
@@ -0,0 +1,237 @@
+import time
+import queue
+import atexit
+import sqlite3
+import threading
+import traceback
+from datetime import datetime
+
+from lib.statistics_rollup import StatisticsRollup
+
+DB_PATH = "assets/smart_traffic.db"
+TIMESTAMP_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+DETECTION_INSERT = (
+    "INSERT INTO vehicle_detections (timestamp, detection_type, confidence, bbox_x1, bbox_y1, bbox_x2, bbox_y2, "
+    "license_plate, vehicle_type, source, image_path) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)")
+ZONE_COUNT_INSERT = (
+    "INSERT INTO zone_counts (timestamp, zone_name, vehicle_count, zone_coordinates, session_id) "
+    "VALUES (?, ?, ?, ?, ?)")
+
+
+def format_timestamp(value=None):
+    """Fecha/hora local en el formato de las columnas DATETIME"""
+    if isinstance(value, str):
+        return value
+    if value is None:
+        value = datetime.now()
+    elif isinstance(value, (int, float)):
+        value = datetime.fromtimestamp(value)
+    return value.strftime(TIMESTAMP_FORMAT)
+
+
+class DatabaseManager:
+    """Acceso a la base de datos SQLite de la aplicación"""
+
+    def __init__(self, db_path=DB_PATH):
+        self.db_path = db_path
+
+    def connect(self):
+        """Nueva conexión (una por hilo)"""
+        return sqlite3.connect(self.db_path, timeout=10)
+
+    @staticmethod
+    def zone_count_values(rows, session_id=None, timestamp=None):
+        """Filas de zone_counts en el orden de ZONE_COUNT_INSERT"""
+        timestamp = format_timestamp(timestamp)
+        return [(timestamp, row['zone_name'], row['vehicle_count'], row['zone_coordinates'], session_id)
+                for row in rows]
+
+    def insert_zone_counts(self, rows, session_id=None, timestamp=None):
+        """Guardar conteos por línea/zona en zone_counts"""
+        if not rows:
+            return 0
+
+        values = self.zone_count_values(rows, session_id, timestamp)
+
+        connection = self.connect()
+        try:
+            with connection:
+                connection.executemany(ZONE_COUNT_INSERT, values)
+        finally:
+            connection.close()
+        return len(values)
+
+    def rebuild_daily_statistics(self, date):
+        """Recalcular las estadísticas de un día desde vehicle_detections (sólo a pedido)"""
+        connection = self.connect()
+        try:
+            with connection:
+                StatisticsRollup.ensure_schema(connection)
+                StatisticsRollup.rebuild_day(connection, date)
+        finally:
+            connection.close()
+
+    def daily_statistics(self, start_date=None, end_date=None):
+        """Filas precalculadas de daily_statistics entre dos fechas 'AAAA-MM-DD' (inclusive)"""
+        connection = self.connect()
+        try:
+            rows = connection.execute(
+                "SELECT date, total_vehicles, total_detections, plates_detected, avg_confidence, peak_hour "
+                "FROM daily_statistics WHERE date >= ? AND date <= ? ORDER BY date",
+                (start_date or '0000-00-00', end_date or '9999-99-99')).fetchall()
+        finally:
+            connection.close()
+        columns = ('date', 'total_vehicles', 'total_detections', 'plates_detected', 'avg_confidence', 'peak_hour')
+        return [dict(zip(columns, row)) for row in rows]
+
+
+class DetectionWriter:
+    """Escritura de detecciones en un hilo propio.
+
+    Los hilos de detección sólo encolan filas (sin esperar al disco); el
+    hilo escritor las inserta por lotes con executemany y confirma cada
+    lote (modo WAL). Si la cola se llena se descartan filas y se cuentan,
+    en lugar de frenar la detección. Ante una caída se pierde a lo sumo
+    el lote en curso (batch_size filas o commit_interval segundos).
+
+    Las estadísticas por hora y día se actualizan en la misma transacción
+    que las detecciones del lote, así que nunca quedan desfasadas.
+    """
+
+    VEHICLE = 'vehicle'
+    PLATE = 'plate'
+
+    def __init__(self, db_path=DB_PATH, max_queue=10000, batch_size=200, commit_interval=1.0):
+        self.database = DatabaseManager(db_path)
+        self.batch_size = batch_size
+        self.commit_interval = commit_interval
+        self.queue = queue.Queue(maxsize=max_queue)
+        self.rollup = StatisticsRollup()
+        self.written = 0
+        self.dropped = 0
+        self.errors = 0
+        self._thread = None
+        self._stop = threading.Event()
+
+    def start(self):
+        if self._thread is not None and self._thread.is_alive():
+            return
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._run, name="detection-writer", daemon=True)
+        self._thread.start()
+
+    def _put(self, statement, values):
+        try:
+            self.queue.put_nowait((statement, values))
+            return True
+        except queue.Full:
+            self.dropped += 1
+            return False
+
+    def record_vehicle(self, vehicle_type, bbox=None, confidence=None, source=None, timestamp=None, image_path=None):
+        """Registrar un vehículo contado"""
+        x1, y1, x2, y2 = (int(value) for value in bbox) if bbox is not None else (None,) * 4
+        return self._put(DETECTION_INSERT, (
+            format_timestamp(timestamp), self.VEHICLE, confidence, x1, y1, x2, y2,
+            None, vehicle_type, source, image_path))
+
+    def record_plate(self, plate, confidence=None, bbox=None, source=None, timestamp=None, image_path=None,
+                     vehicle_type=None):
+        """Registrar una placa leída"""
+        x1, y1, x2, y2 = (int(value) for value in bbox) if bbox is not None else (None,) * 4
+        return self._put(DETECTION_INSERT, (
+            format_timestamp(timestamp), self.PLATE, confidence, x1, y1, x2, y2,
+            plate, vehicle_type, source, image_path))
+
+    def record_zone_counts(self, rows, session_id=None, timestamp=None):
+        """Registrar conteos por línea/zona (mismo formato que insert_zone_counts)"""
+        for values in DatabaseManager.zone_count_values(rows, session_id, timestamp):
+            self._put(ZONE_COUNT_INSERT, values)
+
+    def _write(self, connection, pending):
+        """Insertar un lote en una sola transacción, agrupando por sentencia"""
+        grouped = {}
+        for statement, values in pending:
+            grouped.setdefault(statement, []).append(values)
+            if statement is DETECTION_INSERT:
+                # timestamp, detection_type, confidence
+                self.rollup.add(values[0], values[1], values[2])
+        try:
+            with connection:
+                for statement, rows in grouped.items():
+                    connection.executemany(statement, rows)
+                self.rollup.flush(connection)
+            self.written += len(pending)
+        except sqlite3.Error as e:
+            # El lote no se guardó: descartar también sus contadores
+            self.rollup = StatisticsRollup()
+            self.errors += 1
+            print(f"❌ Error guardando {len(pending)} detecciones: {e}")
+            traceback.print_exc()
+
+    def _run(self):
+        connection = self.database.connect()
+        connection.execute("PRAGMA journal_mode=WAL")
+        connection.execute("PRAGMA synchronous=NORMAL")
+        with connection:
+            StatisticsRollup.ensure_schema(connection)
+
+        pending = []
+        deadline = time.monotonic() + self.commit_interval
+        try:
+            while True:
+                timeout = max(0.0, deadline - time.monotonic())
+                try:
+                    pending.append(self.queue.get(timeout=timeout))
+                except queue.Empty:
+                    pass
+
+                now = time.monotonic()
+                if len(pending) >= self.batch_size or (pending and now >= deadline):
+                    self._write(connection, pending)
+                    pending = []
+                if now >= deadline:
+                    deadline = now + self.commit_interval
+                    if self._stop.is_set() and self.queue.empty():
+                        break
+        finally:
+            if pending:
+                self._write(connection, pending)
+            connection.close()
+
+    def stop(self, timeout=5.0):
+        """Escribir lo pendiente y terminar el hilo"""
+        if self._thread is None:
+            return
+        self._stop.set()
+        self._thread.join(timeout)
+        self._thread = None
+
+    def stats(self):
+        return {'written': self.written, 'dropped': self.dropped, 'errors': self.errors,
+                'queued': self.queue.qsize()}
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def detection_writer(db_path=DB_PATH):
+    """Escritor compartido por todo el proceso para una base de datos (se inicia al pedirlo)"""
+    with _writers_lock:
+        writer = _writers.get(db_path)
+        if writer is None:
+            writer = DetectionWriter(db_path)
+            _writers[db_path] = writer
+        writer.start()
+        return writer
+
+
+@atexit.register
+def stop_writers():
+    """Vaciar las colas de todos los escritores al salir"""
+    with _writers_lock:
+        writers = list(_writers.values())
+    for writer in writers:
+        writer.stop()
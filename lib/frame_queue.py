@@ -0,0 +1,122 @@
+import time
+import threading
+from collections import deque
+
+
+class FrameQueue:
+    """Cola acotada de frames con política de descarte explícita.
+
+    Se usa entre la captura y el procesamiento: la captura nunca espera al
+    detector, y cuando la cola está llena se descarta según la política.
+    Cada frame se guarda junto con su índice de captura y el instante de
+    llegada, para que las etapas posteriores midan latencia real.
+    """
+
+    DROP_OLDEST = 'drop_oldest'  # Conservar siempre el frame más reciente
+    DROP_NEWEST = 'drop_newest'  # Rechazar el frame entrante
+    BLOCK = 'block'              # Esperar espacio (procesamiento offline)
+
+    POLICIES = (DROP_OLDEST, DROP_NEWEST, BLOCK)
+
+    def __init__(self, maxsize=1, drop_policy=DROP_OLDEST):
+        if maxsize < 1:
+            raise ValueError("maxsize debe ser >= 1")
+        if drop_policy not in self.POLICIES:
+            raise ValueError(f"Política de descarte desconocida: {drop_policy}")
+
+        self.maxsize = maxsize
+        self.drop_policy = drop_policy
+        self._items = deque()
+        self._cond = threading.Condition()
+        self._closed = False
+
+        # Contadores
+        self.frames_received = 0
+        self.frames_dropped = 0
+        self.frames_delivered = 0
+
+    def put(self, frame, timestamp=None):
+        """Encolar frame. Devuelve False si el frame entrante fue descartado"""
+        with self._cond:
+            if self._closed:
+                return False
+
+            index = self.frames_received
+            self.frames_received += 1
+            if timestamp is None:
+                timestamp = time.monotonic()
+
+            if len(self._items) >= self.maxsize:
+                if self.drop_policy == self.DROP_NEWEST:
+                    self.frames_dropped += 1
+                    return False
+                if self.drop_policy == self.DROP_OLDEST:
+                    self._items.popleft()
+                    self.frames_dropped += 1
+                else:
+                    while len(self._items) >= self.maxsize and not self._closed:
+                        self._cond.wait()
+                    if self._closed:
+                        return False
+
+            self._items.append((index, timestamp, frame))
+            self._cond.notify_all()
+            return True
+
+    def get(self, timeout=None):
+        """Obtener (índice, timestamp, frame) o None si expira o se cerró"""
+        with self._cond:
+            if not self._items and not self._closed:
+                self._cond.wait(timeout)
+            if not self._items:
+                return None
+
+            item = self._items.popleft()
+            self.frames_delivered += 1
+            self._cond.notify_all()
+            return item
+
+    def get_nowait(self):
+        """Obtener (índice, timestamp, frame) sin esperar, o None"""
+        with self._cond:
+            if not self._items:
+                return None
+            item = self._items.popleft()
+            self.frames_delivered += 1
+            self._cond.notify_all()
+            return item
+
+    def peek_timestamp(self):
+        """Instante de llegada del frame más antiguo en cola, o None"""
+        with self._cond:
+            return self._items[0][1] if self._items else None
+
+    def clear(self):
+        """Vaciar la cola sin contar los frames como descartados"""
+        with self._cond:
+            self._items.clear()
+            self._cond.notify_all()
+
+    def close(self):
+        """Cerrar la cola y despertar a los hilos en espera"""
+        with self._cond:
+            self._closed = True
+            self._cond.notify_all()
+
+    @property
+    def closed(self):
+        return self._closed
+
+    def __len__(self):
+        with self._cond:
+            return len(self._items)
+
+    def stats(self):
+        """Contadores de la cola"""
+        with self._cond:
+            return {
+                'received': self.frames_received,
+                'dropped': self.frames_dropped,
+                'delivered': self.frames_delivered,
+                'queued': len(self._items),
+            }
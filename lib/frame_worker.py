@@ -0,0 +1,72 @@
+import time
+import traceback
+from PyQt5.QtCore import QThread, pyqtSignal
+
+from lib.frame_queue import FrameQueue
+
+
+class FrameWorker(QThread):
+    """Etapa de procesamiento entre la captura y la interfaz.
+
+    Recibe frames desde la captura (``submit``), los procesa en su propio
+    hilo con ``process_fn`` y devuelve el resultado mediante señales.
+    La cola es acotada: si el procesamiento es más lento que el stream,
+    los frames sobrantes se descartan y la latencia se mantiene acotada.
+    """
+
+    # (frame anotado, resultados de process_fn)
+    frameProcessed = pyqtSignal(object, object)
+    processingError = pyqtSignal(str)
+
+    def __init__(self, process_fn, max_queue=1, drop_policy=FrameQueue.DROP_OLDEST, parent=None):
+        super().__init__(parent)
+        self.process_fn = process_fn
+        self.queue = FrameQueue(maxsize=max_queue, drop_policy=drop_policy)
+        self._running = False
+
+        # Métricas
+        self.frames_processed = 0
+        self.last_latency_ms = 0.0
+        self.last_process_ms = 0.0
+
+    def submit(self, frame):
+        """Encolar frame (llamar desde el hilo de captura)"""
+        return self.queue.put(frame)
+
+    def run(self):
+        self._running = True
+        while self._running:
+            item = self.queue.get(timeout=0.1)
+            if item is None:
+                continue
+
+            index, captured_at, frame = item
+            start = time.monotonic()
+            try:
+                frame, result = self.process_fn(frame, index, captured_at)
+            except Exception as e:
+                traceback.print_exc()
+                self.processingError.emit(str(e))
+                continue
+
+            end = time.monotonic()
+            self.frames_processed += 1
+            self.last_process_ms = (end - start) * 1000
+            self.last_latency_ms = (end - captured_at) * 1000
+            self.frameProcessed.emit(frame, result)
+
+    def stop(self):
+        """Detener el hilo y esperar a que termine"""
+        self._running = False
+        self.queue.close()
+        self.wait()
+
+    def stats(self):
+        """Contadores de la cola y tiempos de la última iteración"""
+        stats = self.queue.stats()
+        stats.update({
+            'processed': self.frames_processed,
+            'process_ms': self.last_process_ms,
+            'latency_ms': self.last_latency_ms,
+        })
+        return stats
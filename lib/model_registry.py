@@ -0,0 +1,153 @@
+import os
+import time
+import hashlib
+import threading
+import traceback
+
+try:
+    import psutil
+except ImportError:
+    psutil = None
+
+
+def _rss_bytes():
+    """Memoria residente del proceso (None si psutil no está disponible)"""
+    if psutil is None:
+        return None
+    return psutil.Process().memory_info().rss
+
+
+def sha256_file(path, chunk_size=1024 * 1024):
+    """SHA-256 de un archivo, leído por bloques"""
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(chunk_size), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def verify_checksum(path, checksum_path):
+    """Verificar un archivo contra su suma SHA-256 (formato de sha256sum).
+
+    Lanza FileNotFoundError si falta la suma y ValueError si no coincide.
+    """
+    if not os.path.exists(checksum_path):
+        raise FileNotFoundError(
+            f"Falta la suma de verificación {checksum_path} "
+            f"(generar con: sha256sum {path} > {checksum_path})")
+
+    with open(checksum_path, 'r') as file:
+        content = file.read().split()
+    if not content:
+        raise ValueError(f"Suma de verificación vacía: {checksum_path}")
+
+    expected = content[0].lower()
+    actual = sha256_file(path)
+    if actual != expected:
+        raise ValueError(f"Suma SHA-256 inválida para {path}: {actual} (esperada {expected})")
+
+
+class ModelRegistry:
+    """Registro de modelos compartido por todo el proceso.
+
+    Cada módulo registra una función de carga; el modelo se carga la
+    primera vez que alguien lo pide y se reutiliza en adelante, aunque
+    los widgets se vuelvan a crear al cambiar de pestaña.
+    """
+
+    def __init__(self):
+        self._loaders = {}
+        self._models = {}
+        self._locks = {}
+        self._stats = {}
+        self._lock = threading.Lock()
+        self._warmup_thread = None
+
+    def register(self, name, loader):
+        """Registrar la función que carga el modelo (no lo carga todavía)"""
+        with self._lock:
+            self._loaders[name] = loader
+            self._locks.setdefault(name, threading.Lock())
+
+    def names(self):
+        with self._lock:
+            return list(self._loaders.keys())
+
+    def is_loaded(self, name):
+        return name in self._models
+
+    def get(self, name):
+        """Obtener el modelo, cargándolo la primera vez"""
+        model = self._models.get(name)
+        if model is not None:
+            return model
+
+        with self._lock:
+            if name not in self._loaders:
+                raise KeyError(f"Modelo no registrado: {name}")
+            lock = self._locks[name]
+            loader = self._loaders[name]
+
+        # Un lock por modelo: si otro hilo lo está cargando, esperar a que termine
+        with lock:
+            model = self._models.get(name)
+            if model is not None:
+                return model
+
+            rss_before = _rss_bytes()
+            start = time.perf_counter()
+            model = loader()
+            load_s = time.perf_counter() - start
+            rss_after = _rss_bytes()
+
+            rss_mb = None
+            if rss_before is not None and rss_after is not None:
+                rss_mb = (rss_after - rss_before) / (1024 * 1024)
+
+            self._stats[name] = {'load_s': load_s, 'rss_mb': rss_mb}
+            self._models[name] = model
+
+        memory = f", +{rss_mb:.0f} MB" if rss_mb is not None else ""
+        print(f"✅ Modelo '{name}' cargado en {load_s:.1f}s{memory}")
+        return model
+
+    def unload(self, name):
+        """Liberar un modelo cargado (se volverá a cargar si se pide)"""
+        with self._lock:
+            self._models.pop(name, None)
+            self._stats.pop(name, None)
+
+    def warmup(self, names=None, background=True, exclude=()):
+        """Cargar modelos por adelantado, por defecto en un hilo de fondo.
+
+        Los modelos se cargan uno tras otro para que la memoria medida
+        para cada uno no se mezcle con la de los demás. exclude: modelos
+        registrados que este proceso no usa (ej: los que cargan otros procesos).
+        """
+        if names is None:
+            names = self.names()
+        names = [name for name in names if name not in exclude]
+
+        def load_all():
+            for name in names:
+                try:
+                    self.get(name)
+                except Exception as e:
+                    print(f"⚠️ No se pudo precargar el modelo '{name}': {e}")
+                    traceback.print_exc()
+
+        if not background:
+            load_all()
+            return None
+
+        self._warmup_thread = threading.Thread(target=load_all, name="model-warmup", daemon=True)
+        self._warmup_thread.start()
+        return self._warmup_thread
+
+    def stats(self):
+        """Tiempo de carga (s) y memoria residente (MB) por modelo cargado"""
+        return {name: dict(stats) for name, stats in self._stats.items()}
+
+
+# Registro único del proceso
+registry = ModelRegistry()
@@ -0,0 +1,251 @@
+import os
+import re
+import json
+import time
+from collections import deque
+from urllib.parse import urlsplit
+
+import cv2
+import numpy as np
+
+CALIBRATION_DIR = "assets/calibration"
+
+
+def video_fps(path):
+    """FPS declarado por el archivo de video (0 si no se conoce)"""
+    capture = cv2.VideoCapture(path)
+    try:
+        return capture.get(cv2.CAP_PROP_FPS) or 0.0
+    finally:
+        capture.release()
+
+
+class FrameClock:
+    """Tiempo de cada frame según el video, no según cuándo se procesa.
+
+    En orden de preferencia: PTS del contenedor, índice de captura / FPS
+    (archivos) o instante de llegada del frame (streams en vivo). Así la
+    velocidad no depende de la carga de la máquina, de los frames
+    descartados ni de la detección cada k frames.
+    """
+
+    def __init__(self, fps=0.0, live=False):
+        self.fps = fps
+        self.live = live
+
+    def time(self, index, captured_at=None, pts_ms=None):
+        """Segundos del frame (el origen es arbitrario: sólo importan las diferencias)"""
+        if pts_ms is not None and pts_ms > 0:
+            return pts_ms / 1000.0
+        if not self.live and self.fps > 0:
+            return index / self.fps
+        return captured_at if captured_at is not None else time.monotonic()
+
+
+class GroundPlane:
+    """Conversión de píxeles a metros sobre el plano de la calle (homografía).
+
+    Se calibra con al menos 4 puntos de la imagen y su posición en metros
+    sobre el suelo (ej: esquinas de una senda peatonal o marcas del carril).
+    Sin homografía se usa una escala única de píxeles por metro.
+    """
+
+    def __init__(self, homography):
+        self.homography = np.asarray(homography, dtype=np.float64)
+
+    @classmethod
+    def from_points(cls, image_points, world_points):
+        image_points = np.asarray(image_points, dtype=np.float64)
+        world_points = np.asarray(world_points, dtype=np.float64)
+        if len(image_points) < 4 or image_points.shape != world_points.shape:
+            raise ValueError("La homografía necesita al menos 4 pares de puntos (imagen, metros)")
+        homography, _ = cv2.findHomography(image_points, world_points)
+        if homography is None:
+            raise ValueError("Puntos de calibración degenerados (3 o más alineados)")
+        return cls(homography)
+
+    @classmethod
+    def from_scale(cls, pixels_per_meter):
+        return cls(np.diag([1.0 / pixels_per_meter, 1.0 / pixels_per_meter, 1.0]))
+
+    def to_world(self, points):
+        """Puntos (N x 2) en píxeles a metros sobre el suelo"""
+        points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+        projected = np.hstack([points, np.ones((len(points), 1))]) @ self.homography.T
+        return projected[:, :2] / projected[:, 2:3]
+
+
+class SpeedLines:
+    """Medición por tiempo de vuelo entre dos líneas a distancia conocida"""
+
+    def __init__(self, entry, exit, distance_m):
+        self.entry = np.asarray(entry, dtype=np.float64).reshape(2, 2)
+        self.exit = np.asarray(exit, dtype=np.float64).reshape(2, 2)
+        self.distance_m = float(distance_m)
+
+    @staticmethod
+    def crossing_fraction(line, prev_point, curr_point):
+        """Fracción (0-1) del recorrido prev->curr donde se cruza el segmento, o None"""
+        p1, p2 = line
+        direction = p2 - p1
+        side_prev = direction[0] * (prev_point[1] - p1[1]) - direction[1] * (prev_point[0] - p1[0])
+        side_curr = direction[0] * (curr_point[1] - p1[1]) - direction[1] * (curr_point[0] - p1[0])
+        if side_prev == side_curr or side_prev * side_curr > 0:
+            return None
+
+        fraction = side_prev / (side_prev - side_curr)
+        point = prev_point + fraction * (curr_point - prev_point)
+        along = np.dot(point - p1, direction) / np.dot(direction, direction)
+        return fraction if 0.0 <= along <= 1.0 else None
+
+
+class SpeedEstimator:
+    """Velocidad por vehículo a partir de su posición en el suelo y el tiempo de cada frame.
+
+    Por defecto la velocidad es la pendiente (mínimos cuadrados) de la
+    posición en metros contra el tiempo, sobre las muestras de los últimos
+    window segundos. Con lines, la velocidad de un vehículo es la distancia
+    entre las dos líneas dividida por el tiempo entre sus cruces
+    (interpolado entre frames); hasta cruzar ambas se informa la estimada.
+    """
+
+    def __init__(self, ground_plane, lines=None, window=0.5, min_samples=3, max_speed=200.0):
+        self.ground_plane = ground_plane
+        self.lines = lines
+        self.window = window
+        self.min_samples = min_samples
+        self.max_speed = max_speed  # km/h; por encima se descarta como error de tracking
+        self._history = {}    # id -> deque de (tiempo, x, y en metros)
+        self._last_point = {}  # id -> (tiempo, punto en píxeles) para las líneas
+        self._entry_time = {}  # id -> tiempo de cruce de la primera línea
+        self._timed = {}       # id -> km/h medidos entre líneas
+        self._speeds = {}      # id -> km/h
+
+    def update(self, track_ids, image_points, frame_time):
+        """Agregar la posición de cada vehículo en este frame y devolver {id: km/h} de los medidos"""
+        image_points = np.asarray(image_points, dtype=np.float64).reshape(-1, 2)
+        world_points = self.ground_plane.to_world(image_points)
+
+        speeds = {}
+        for track_id, point, world in zip(track_ids, image_points, world_points):
+            history = self._history.setdefault(track_id, deque())
+            history.append((frame_time, world[0], world[1]))
+            while history and frame_time - history[0][0] > self.window:
+                history.popleft()
+
+            speed = None
+            if self.lines is not None:
+                speed = self._time_of_flight(track_id, point, frame_time)
+                if speed is not None:
+                    self._timed[track_id] = speed
+            if track_id in self._timed:
+                speed = self._timed[track_id]  # Medida entre líneas: queda fija
+            elif speed is None:
+                speed = self._fit(history)
+
+            if speed is not None and 0 < speed < self.max_speed:
+                self._speeds[track_id] = speed
+                speeds[track_id] = speed
+        return speeds
+
+    def _fit(self, history):
+        if len(history) < self.min_samples:
+            return None
+        samples = np.array(history)
+        times = samples[:, 0] - samples[:, 0].mean()
+        spread = np.dot(times, times)
+        if spread <= 0:
+            return None
+        velocity = times @ (samples[:, 1:] - samples[:, 1:].mean(axis=0)) / spread  # m/s en x, y
+        return float(np.linalg.norm(velocity)) * 3.6
+
+    def _time_of_flight(self, track_id, point, frame_time):
+        """Velocidad entre líneas cuando el vehículo cruza la segunda (None si todavía no)"""
+        last = self._last_point.get(track_id)
+        self._last_point[track_id] = (frame_time, point)
+        if last is None:
+            return None
+
+        last_time, last_point = last
+        for line, is_entry in ((self.lines.entry, True), (self.lines.exit, False)):
+            fraction = SpeedLines.crossing_fraction(line, last_point, point)
+            if fraction is None:
+                continue
+            crossed_at = last_time + fraction * (frame_time - last_time)
+            if is_entry:
+                self._entry_time[track_id] = crossed_at
+            elif track_id in self._entry_time:
+                elapsed = crossed_at - self._entry_time.pop(track_id)
+                if elapsed > 0:
+                    return self.lines.distance_m / elapsed * 3.6
+        return None
+
+    def speed(self, track_id):
+        """Última velocidad medida del vehículo (km/h) o None"""
+        return self._speeds.get(track_id)
+
+    def forget(self, active_ids):
+        """Olvidar los vehículos que el tracker ya no sigue"""
+        active_ids = set(active_ids)
+        for store in (self._history, self._last_point, self._entry_time, self._timed, self._speeds):
+            for track_id in [track_id for track_id in store if track_id not in active_ids]:
+                del store[track_id]
+
+    def clear(self):
+        self.forget(())
+
+
+def calibration_path(source, directory=CALIBRATION_DIR):
+    """Archivo de calibración de una cámara: nombre del video o URL sin caracteres especiales.
+
+    De las URLs sólo se usan host, puerto y ruta: nunca usuario, contraseña ni parámetros.
+    """
+    source = str(source).rstrip('/')
+    if '://' in source:
+        url = urlsplit(source)
+        name = (url.hostname or '') + (f"_{url.port}" if url.port else '') + url.path
+    else:
+        name = os.path.splitext(os.path.basename(source))[0]
+    return os.path.join(directory, re.sub(r'[^\w-]+', '_', name).strip('_') + '.json')
+
+
+def load_speed_estimator(source, frame_size=None, pixels_per_meter=8.8, directory=CALIBRATION_DIR):
+    """Crear el estimador de una cámara con su calibración (o la escala por defecto si no tiene).
+
+    Formato del JSON:
+        {"normalized": false,
+         "image_points": [[x, y], ...], "world_points": [[x_m, y_m], ...],
+         "pixels_per_meter": 8.8,
+         "speed_lines": {"entry": [[x1, y1], [x2, y2]], "exit": [[x1, y1], [x2, y2]], "distance_m": 10.0}}
+
+    image_points/world_points (al menos 4) definen la homografía; sin
+    ellos se usa pixels_per_meter. speed_lines activa la medición por
+    tiempo entre líneas. Con "normalized": true las coordenadas de la
+    imagen van de 0 a 1 y se escalan con frame_size (ancho, alto).
+    """
+    path = calibration_path(source, directory) if source else None
+    if path is None or not os.path.exists(path):
+        print(f"📐 Sin calibración de velocidad ({path}): usando {pixels_per_meter} píxeles/metro")
+        return SpeedEstimator(GroundPlane.from_scale(pixels_per_meter))
+
+    with open(path, 'r', encoding='utf-8') as file:
+        config = json.load(file)
+
+    scale = np.ones(2, dtype=np.float64)
+    if config.get('normalized'):
+        if frame_size is None:
+            raise ValueError("Coordenadas normalizadas requieren el tamaño del frame")
+        scale = np.array(frame_size, dtype=np.float64)
+
+    if 'image_points' in config:
+        ground_plane = GroundPlane.from_points(np.asarray(config['image_points']) * scale, config['world_points'])
+    else:
+        ground_plane = GroundPlane.from_scale(config.get('pixels_per_meter', pixels_per_meter))
+
+    lines = None
+    if 'speed_lines' in config:
+        item = config['speed_lines']
+        lines = SpeedLines(np.asarray(item['entry']) * scale, np.asarray(item['exit']) * scale, item['distance_m'])
+
+    print(f"📐 Calibración de velocidad: {path}" + (" (tiempo entre líneas)" if lines else ""))
+    return SpeedEstimator(ground_plane, lines)
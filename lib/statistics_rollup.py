@@ -0,0 +1,112 @@
+from collections import defaultdict
+
+HOURLY_SCHEMA = """
+CREATE TABLE IF NOT EXISTS hourly_statistics (
+    date DATE NOT NULL,
+    hour INTEGER NOT NULL,
+    total_vehicles INTEGER DEFAULT 0,
+    plates_detected INTEGER DEFAULT 0,
+    total_detections INTEGER DEFAULT 0,
+    confidence_sum REAL DEFAULT 0,
+    confidence_count INTEGER DEFAULT 0,
+    PRIMARY KEY (date, hour)
+)"""
+
+HOURLY_UPSERT = """
+INSERT INTO hourly_statistics (date, hour, total_vehicles, plates_detected, total_detections,
+                               confidence_sum, confidence_count)
+VALUES (?, ?, ?, ?, ?, ?, ?)
+ON CONFLICT (date, hour) DO UPDATE SET
+    total_vehicles = total_vehicles + excluded.total_vehicles,
+    plates_detected = plates_detected + excluded.plates_detected,
+    total_detections = total_detections + excluded.total_detections,
+    confidence_sum = confidence_sum + excluded.confidence_sum,
+    confidence_count = confidence_count + excluded.confidence_count"""
+
+# El día se recalcula desde sus (a lo sumo 24) filas por hora, nunca desde vehicle_detections.
+# Hora pico: la de más vehículos (o más detecciones si no hubo vehículos)
+DAILY_UPSERT = """
+INSERT INTO daily_statistics (date, total_vehicles, total_detections, plates_detected, avg_confidence, peak_hour)
+SELECT date,
+       SUM(total_vehicles),
+       SUM(total_detections),
+       SUM(plates_detected),
+       CASE WHEN SUM(confidence_count) > 0 THEN SUM(confidence_sum) / SUM(confidence_count) ELSE 0 END,
+       (SELECT hour FROM hourly_statistics AS peak WHERE peak.date = hourly_statistics.date
+        ORDER BY total_vehicles DESC, total_detections DESC, hour LIMIT 1)
+FROM hourly_statistics
+WHERE date = ?
+GROUP BY date
+ON CONFLICT (date) DO UPDATE SET
+    total_vehicles = excluded.total_vehicles,
+    total_detections = excluded.total_detections,
+    plates_detected = excluded.plates_detected,
+    avg_confidence = excluded.avg_confidence,
+    peak_hour = excluded.peak_hour"""
+
+HOURLY_REBUILD = """
+INSERT INTO hourly_statistics (date, hour, total_vehicles, plates_detected, total_detections,
+                               confidence_sum, confidence_count)
+SELECT substr(timestamp, 1, 10),
+       CAST(substr(timestamp, 12, 2) AS INTEGER),
+       SUM(detection_type = 'vehicle'),
+       SUM(detection_type = 'plate'),
+       COUNT(*),
+       TOTAL(confidence),
+       COUNT(confidence)
+FROM vehicle_detections
+WHERE timestamp >= ? AND timestamp < ?
+GROUP BY 1, 2"""
+
+
+class StatisticsRollup:
+    """Contadores por hora y por día que se actualizan al llegar cada detección.
+
+    Los contadores se acumulan en memoria y flush() los suma a
+    hourly_statistics con upserts y recalcula en daily_statistics sólo
+    los días tocados. Así las estadísticas se leen de filas precalculadas
+    (una por día) sin recorrer vehicle_detections.
+    """
+
+    def __init__(self):
+        # (fecha, hora) -> [vehículos, placas, detecciones, suma de confianza, confianzas]
+        self._hours = defaultdict(lambda: [0, 0, 0, 0.0, 0])
+
+    def add(self, timestamp, detection_type, confidence=None):
+        """Sumar una detección (timestamp en formato 'AAAA-MM-DD HH:MM:SS')"""
+        counters = self._hours[(timestamp[:10], int(timestamp[11:13]))]
+        if detection_type == 'vehicle':
+            counters[0] += 1
+        elif detection_type == 'plate':
+            counters[1] += 1
+        counters[2] += 1
+        if confidence is not None:
+            counters[3] += confidence
+            counters[4] += 1
+
+    def __len__(self):
+        return len(self._hours)
+
+    @staticmethod
+    def ensure_schema(connection):
+        connection.execute(HOURLY_SCHEMA)
+
+    def flush(self, connection):
+        """Escribir los contadores pendientes (dentro de la transacción del llamador)"""
+        if not self._hours:
+            return 0
+
+        rows = [(date, hour, *counters) for (date, hour), counters in self._hours.items()]
+        dates = sorted({date for date, _ in self._hours})
+        connection.executemany(HOURLY_UPSERT, rows)
+        connection.executemany(DAILY_UPSERT, [(date,) for date in dates])
+        self._hours.clear()
+        return len(dates)
+
+    @staticmethod
+    def rebuild_day(connection, date):
+        """Recalcular un día ('AAAA-MM-DD') desde vehicle_detections (sólo a pedido)"""
+        connection.execute("DELETE FROM hourly_statistics WHERE date = ?", (date,))
+        connection.execute("DELETE FROM daily_statistics WHERE date = ?", (date,))
+        connection.execute(HOURLY_REBUILD, (f"{date} 00:00:00", f"{date} 24:00:00"))
+        connection.execute(DAILY_UPSERT, (date,))
@@ -0,0 +1,232 @@
+import os
+import time
+import threading
+import traceback
+
+import cv2
+
+from lib.frame_queue import FrameQueue
+
+
+def is_live_source(path):
+    """Las URLs (rtsp://, http://) y cámaras locales son fuentes en vivo"""
+    return '://' in str(path) or str(path).isdigit()
+
+
+class StreamSource:
+    """Decodifica una fuente de video en su propio hilo hacia una cola acotada.
+
+    En vivo se descartan los frames viejos (drop_oldest); para archivos la
+    decodificación espera al procesamiento y no se pierde ningún frame.
+    """
+
+    def __init__(self, name, path, realtime, max_queue=2, timer=None):
+        self.name = name
+        self.path = path
+        self.realtime = realtime
+        self.timer = timer  # Opcional: measure(etapa, inicio) con el tiempo de decodificación
+        policy = FrameQueue.DROP_OLDEST if realtime else FrameQueue.BLOCK
+        self.queue = FrameQueue(maxsize=max_queue, drop_policy=policy)
+        self.fps = 0.0
+        self.finished = False
+        self.frames_processed = 0
+        self.deadline_missed = 0
+        self._capture = None
+        self._thread = None
+        self._running = False
+
+    def start(self):
+        source = int(self.path) if str(self.path).isdigit() else self.path
+        self._capture = cv2.VideoCapture(source)
+        if not self._capture.isOpened():
+            print(f"❌ No se pudo abrir la fuente: {self.path}")
+            self.finished = True
+            return False
+
+        self.fps = self._capture.get(cv2.CAP_PROP_FPS) or 0.0
+        self._running = True
+        self._thread = threading.Thread(target=self._decode_loop, name=f"decode-{self.name}", daemon=True)
+        self._thread.start()
+        return True
+
+    def _decode_loop(self):
+        index = 0
+        try:
+            while self._running:
+                start = time.perf_counter()
+                ok, frame = self._capture.read()
+                if not ok:
+                    break
+                if self.timer is not None:
+                    self.timer.measure('decode', start)
+
+                # Tiempo del frame en el video (PTS o índice / FPS)
+                msec = self._capture.get(cv2.CAP_PROP_POS_MSEC)
+                video_time = msec / 1000.0 if msec and msec > 0 else (index / self.fps if self.fps > 0 else 0.0)
+                self.queue.put((video_time, frame))
+                index += 1
+        finally:
+            self.finished = True
+            self._capture.release()
+
+    def stop(self):
+        self._running = False
+        self.queue.close()
+        if self._thread is not None:
+            self._thread.join(timeout=2.0)
+
+    @property
+    def exhausted(self):
+        """Terminó de decodificar y ya no quedan frames en cola"""
+        return self.finished and len(self.queue) == 0
+
+    def stats(self):
+        stats = self.queue.stats()
+        stats.update({'processed': self.frames_processed, 'deadline_missed': self.deadline_missed})
+        return stats
+
+
+class StreamEngine:
+    """Procesa varias fuentes con un solo juego de modelos cargados.
+
+    Cada fuente se decodifica en su propio hilo; el motor arma lotes con
+    frames de distintas fuentes, hace una inferencia por lote con el modelo
+    compartido del pipeline y aplica el resultado al estado de cada stream
+    (tracker, contadores). La memoria crece con el número de streams, no
+    con copias del modelo.
+
+    El pipeline debe implementar:
+        create_state(name)                    -> estado por stream
+        infer_batch(states, frames)           -> detecciones por frame
+        step(state, frame, detections)        -> eventos del frame
+
+    Con timer (measure(etapa, inicio)) se mide decode en cada fuente,
+    detect en infer_batch y step_stage en cada step.
+    """
+
+    ROUND_ROBIN = 'round_robin'
+    DEADLINE = 'deadline'
+
+    def __init__(self, sources, pipeline, batch_size=4, scheduling=ROUND_ROBIN, realtime=None,
+                 max_queue=2, max_latency=0.5, on_result=None, timer=None, step_stage='step'):
+        if scheduling not in (self.ROUND_ROBIN, self.DEADLINE):
+            raise ValueError(f"Planificación desconocida: {scheduling}")
+        if realtime is None:
+            realtime = any(is_live_source(path) for path in sources)
+
+        self.pipeline = pipeline
+        self.batch_size = max(1, batch_size)
+        self.scheduling = scheduling
+        self.realtime = realtime
+        self.max_latency = max_latency
+        self.on_result = on_result
+        self.timer = timer
+        self.step_stage = step_stage
+
+        self.streams = []
+        self.states = []
+        for i, path in enumerate(sources):
+            name = f"{i}:{os.path.basename(str(path)) or path}"
+            self.streams.append(StreamSource(name, path, realtime, max_queue=max_queue, timer=timer))
+            self.states.append(pipeline.create_state(name))
+
+        self.batches = 0
+        self._next = 0
+        self._running = False
+
+    def _next_batch_round_robin(self):
+        """Un frame por stream por turno, empezando donde terminó el lote anterior.
+
+        Se dan vueltas mientras haya frames en cola y el lote no esté lleno.
+        """
+        batch = []
+        count = len(self.streams)
+        while True:
+            taken = len(batch)
+            for offset in range(count):
+                i = (self._next + offset) % count
+                item = self.streams[i].queue.get_nowait()
+                if item is not None:
+                    batch.append((i, item))
+                    if len(batch) >= self.batch_size:
+                        self._next = (i + 1) % count
+                        return batch
+            self._next = (self._next + 1) % count
+            if len(batch) == taken:
+                return batch
+
+    def _next_batch_deadline(self):
+        """Primero los frames más antiguos; en vivo se descartan los que ya vencieron"""
+        pending = []
+        for i, stream in enumerate(self.streams):
+            arrived = stream.queue.peek_timestamp()
+            if arrived is not None:
+                pending.append((arrived + self.max_latency, i))
+        pending.sort()
+
+        now = time.monotonic()
+        batch = []
+        for deadline, i in pending:
+            item = self.streams[i].queue.get_nowait()
+            if item is None:
+                continue
+            if self.realtime and deadline < now:
+                self.streams[i].deadline_missed += 1
+                continue
+            batch.append((i, item))
+            if len(batch) >= self.batch_size:
+                break
+        return batch
+
+    def _process_batch(self, batch):
+        frames = [item[2][1] for _, item in batch]
+        states = [self.states[i] for i, _ in batch]
+        start = time.perf_counter()
+        detections = self.pipeline.infer_batch(states, frames)
+        self._measure('detect', start)
+        self.batches += 1
+
+        for (i, (index, _, (video_time, frame))), frame_detections in zip(batch, detections):
+            start = time.perf_counter()
+            events = self.pipeline.step(self.states[i], frame, frame_detections)
+            self._measure(self.step_stage, start)
+            self.streams[i].frames_processed += 1
+            if self.on_result is not None:
+                self.on_result(self.streams[i].name, index, video_time, frame, frame_detections, events)
+
+    def _measure(self, stage, start):
+        if self.timer is not None:
+            self.timer.measure(stage, start)
+
+    def run(self):
+        """Procesar hasta que todas las fuentes terminen o se llame a stop()"""
+        started = [stream.start() for stream in self.streams]
+        if not any(started):
+            return
+
+        next_batch = self._next_batch_deadline if self.scheduling == self.DEADLINE else self._next_batch_round_robin
+        self._running = True
+        try:
+            while self._running:
+                batch = next_batch()
+                if not batch:
+                    if all(stream.exhausted for stream in self.streams):
+                        break
+                    time.sleep(0.002)
+                    continue
+                try:
+                    self._process_batch(batch)
+                except Exception as e:
+                    print(f"❌ Error procesando lote: {e}")
+                    traceback.print_exc()
+        finally:
+            self._running = False
+            for stream in self.streams:
+                stream.stop()
+
+    def stop(self):
+        self._running = False
+
+    def stats(self):
+        """Contadores por stream"""
+        return {stream.name: stream.stats() for stream in self.streams}
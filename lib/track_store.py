@@ -0,0 +1,87 @@
+import numpy as np
+
+
+class TrackStore:
+    """Almacén de tracks en columnas NumPy con reutilización de posiciones.
+
+    Cada track ocupa una posición (slot) de capacidad fija; al eliminarlo
+    la posición queda libre para el siguiente. La memoria depende del
+    máximo de objetos simultáneos, no del tiempo que lleve corriendo.
+    """
+
+    def __init__(self, capacity=256):
+        self.capacity = 0
+        self._free = []
+        self._allocate(capacity)
+        self.next_object_id = 0
+
+    def _allocate(self, capacity):
+        """Crear (o ampliar) las columnas conservando los tracks existentes"""
+        old_capacity = self.capacity
+        columns = {
+            'active': (np.zeros, (capacity,), bool),
+            'object_id': (np.zeros, (capacity,), np.int64),
+            'class_id': (np.zeros, (capacity,), np.int32),
+            'type_number': (np.zeros, (capacity,), np.int32),
+            'centroid': (np.zeros, (capacity, 2), np.float32),
+            'prev_centroid': (np.zeros, (capacity, 2), np.float32),
+            'velocity': (np.zeros, (capacity, 2), np.float32),         # Píxeles por frame
+            'covariance': (np.zeros, (capacity, 4, 4), np.float32),    # Kalman: (x, y, vx, vy)
+            'hits': (np.zeros, (capacity,), np.int32),                 # Detecciones emparejadas
+            'bbox': (np.zeros, (capacity, 4), np.int32),
+            'disappeared': (np.zeros, (capacity,), np.int32),
+            'counted': (np.zeros, (capacity,), bool),
+            'counted_lines': (np.zeros, (capacity,), np.int64),   # Bit i: contado en la línea i
+            'zones_entered': (np.zeros, (capacity,), np.int64),   # Bit i: entró a la zona i
+        }
+        for name, (factory, shape, dtype) in columns.items():
+            column = factory(shape, dtype=dtype)
+            if old_capacity:
+                column[:old_capacity] = getattr(self, name)
+            setattr(self, name, column)
+
+        # Las posiciones nuevas se entregan en orden ascendente
+        self._free.extend(range(capacity - 1, old_capacity - 1, -1))
+        self.capacity = capacity
+
+    def add(self, centroid, bbox, class_id, type_number=0, covariance=None):
+        """Registrar un track y devolver su posición"""
+        if not self._free:
+            # Más objetos simultáneos que la capacidad: ampliar una vez
+            self._allocate(self.capacity * 2)
+
+        slot = self._free.pop()
+        self.active[slot] = True
+        self.object_id[slot] = self.next_object_id
+        self.class_id[slot] = class_id
+        self.type_number[slot] = type_number
+        self.centroid[slot] = centroid
+        self.prev_centroid[slot] = centroid
+        self.velocity[slot] = 0
+        self.covariance[slot] = 0 if covariance is None else covariance
+        self.hits[slot] = 1
+        self.bbox[slot] = bbox
+        self.disappeared[slot] = 0
+        self.counted[slot] = False
+        self.counted_lines[slot] = 0
+        self.zones_entered[slot] = 0
+        self.next_object_id += 1
+        return slot
+
+    def remove(self, slots):
+        """Liberar una o varias posiciones"""
+        slots = np.atleast_1d(slots)
+        slots = slots[self.active[slots]]
+        self.active[slots] = False
+        self._free.extend(slots.tolist())
+
+    def active_slots(self):
+        """Posiciones ocupadas"""
+        return np.flatnonzero(self.active)
+
+    def clear(self):
+        """Eliminar todos los tracks (los ids no se reinician)"""
+        self.remove(self.active_slots())
+
+    def __len__(self):
+        return int(np.count_nonzero(self.active))
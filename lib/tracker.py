@@ -0,0 +1,168 @@
+import numpy as np
+from scipy.optimize import linear_sum_assignment
+from lib.track_store import TrackStore
+
+# Chi-cuadrado con 2 grados de libertad al 99%: distancia de Mahalanobis máxima para emparejar
+GATE_99 = 9.21
+
+# Modelo de velocidad constante con estado (x, y, vx, vy) y paso de un frame
+TRANSITION = np.array([[1, 0, 1, 0],
+                       [0, 1, 0, 1],
+                       [0, 0, 1, 0],
+                       [0, 0, 0, 1]], dtype=np.float32)
+
+
+class KalmanTracker:
+    """Tracker de centroides con filtro de Kalman de velocidad constante.
+
+    El estado de todos los tracks vive en un TrackStore (centroid y
+    velocity en píxeles y píxeles/frame, covariance 4x4) y se predice y
+    corrige de una vez con operaciones NumPy. Las detecciones se emparejan
+    por clase con el algoritmo húngaro contra la posición prevista: sólo
+    pares dentro del umbral de Mahalanobis (la incertidumbre crece con cada
+    predicción) y a menos de max_distance más la velocidad del track (la
+    incertidumbre inicial de velocidad en tracks nuevos) por cada frame
+    transcurrido desde la última detección, así los vehículos rápidos
+    conservan su ID.
+
+    Llamar predict() una vez por frame (con o sin detección) y update()
+    en los frames con detección.
+    """
+
+    def __init__(self, max_distance=80, max_disappeared=40, max_coast=10, gate=GATE_99,
+                 process_noise=2.0, measurement_noise=4.0, velocity_noise=30.0, capacity=256):
+        self.tracks = TrackStore(capacity)
+        self.max_distance = max_distance
+        self.max_disappeared = max_disappeared
+        self.max_coast = max_coast  # Frames sin detección que un track sigue avanzando
+        self.gate = gate
+        self.velocity_noise = velocity_noise
+        self.frame_index = 0
+        self.last_update_frame = 0
+
+        # Ruido de aceleración (px/frame²) y de medición (px), incertidumbre inicial de velocidad (px/frame)
+        q = process_noise ** 2
+        self.process_covariance = np.array([[q / 4, 0, q / 2, 0],
+                                            [0, q / 4, 0, q / 2],
+                                            [q / 2, 0, q, 0],
+                                            [0, q / 2, 0, q]], dtype=np.float32)
+        self.measurement_covariance = np.eye(2, dtype=np.float32) * measurement_noise ** 2
+        self.initial_covariance = np.diag([measurement_noise ** 2, measurement_noise ** 2,
+                                           velocity_noise ** 2, velocity_noise ** 2]).astype(np.float32)
+
+    def predict(self):
+        """Avanzar un frame todos los tracks: posición, caja e incertidumbre"""
+        self.frame_index += 1
+        tracks = self.tracks
+        slots = tracks.active_slots()
+        if len(slots) == 0:
+            return
+
+        tracks.prev_centroid[slots] = tracks.centroid[slots]
+        tracks.covariance[slots] = TRANSITION @ tracks.covariance[slots] @ TRANSITION.T + self.process_covariance
+
+        # Los tracks perdidos hace más de max_coast frames quedan quietos (sólo crece su incertidumbre)
+        moving = slots[tracks.disappeared[slots] <= self.max_coast]
+        if len(moving):
+            old_centers = np.rint(tracks.centroid[moving]).astype(np.int32)
+            tracks.centroid[moving] += tracks.velocity[moving]
+            shift = np.rint(tracks.centroid[moving]).astype(np.int32) - old_centers
+            tracks.bbox[moving] += np.tile(shift, 2)
+
+    def assign(self, slots, det_points, det_classes, elapsed=1):
+        """Asignación óptima tracks-detecciones por clase dentro de la compuerta.
+
+        elapsed: frames desde la última detección (con detección cada k frames
+        el desvío posible respecto a la predicción crece con k).
+
+        Devuelve dos arreglos: índices (sobre slots) de track e índices de detección emparejados.
+        """
+        tracks = self.tracks
+        track_classes = tracks.class_id[slots]
+        track_matches = []
+        det_matches = []
+        for class_id in np.intersect1d(track_classes, det_classes):
+            track_idx = np.flatnonzero(track_classes == class_id)
+            det_idx = np.flatnonzero(det_classes == class_id)
+            class_slots = slots[track_idx]
+
+            # Innovación (detecciones - posición prevista) y su covarianza S = HPH' + R
+            residual = det_points[None, det_idx, :] - tracks.centroid[class_slots, None, :]
+            innovation = tracks.covariance[class_slots, :2, :2] + self.measurement_covariance
+            inverse = np.linalg.inv(innovation)
+            mahalanobis = np.einsum('tdi,tij,tdj->td', residual, inverse, residual)
+            distance = np.linalg.norm(residual, axis=2)
+
+            cost = mahalanobis.copy()
+            # Tope en píxeles según la velocidad: los tracks sin velocidad estimada admiten velocity_noise
+            speed = np.linalg.norm(tracks.velocity[class_slots], axis=1)
+            speed = np.where(tracks.hits[class_slots] > 1, speed, np.maximum(speed, self.velocity_noise))
+            limit = (self.max_distance + speed) * elapsed
+            gated = (mahalanobis > self.gate) | (distance >= limit[:, None])
+            cost[gated] = 1e6  # Pares fuera de la compuerta: solo se asignan si no hay alternativa
+
+            rows, cols = linear_sum_assignment(cost)
+            valid = ~gated[rows, cols]
+            track_matches.append(track_idx[rows[valid]])
+            det_matches.append(det_idx[cols[valid]])
+
+        if not track_matches:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+        return np.concatenate(track_matches), np.concatenate(det_matches)
+
+    def correct(self, slots, measurements):
+        """Corrección de Kalman de varios tracks con sus centroides medidos"""
+        tracks = self.tracks
+        covariance = tracks.covariance[slots]
+        innovation = covariance[:, :2, :2] + self.measurement_covariance
+        gain = covariance[:, :, :2] @ np.linalg.inv(innovation)  # K = PH'S⁻¹ (n x 4 x 2)
+
+        residual = measurements - tracks.centroid[slots]
+        correction = np.einsum('nij,nj->ni', gain, residual)
+        tracks.centroid[slots] += correction[:, :2]
+        tracks.velocity[slots] += correction[:, 2:]
+        tracks.covariance[slots] = covariance - gain @ covariance[:, :2, :]
+
+    def update(self, centroids, boxes, class_ids):
+        """Emparejar las detecciones del frame, corregir, crear y eliminar tracks.
+
+        Devuelve (posición de track de cada detección, posiciones de los tracks nuevos).
+        """
+        tracks = self.tracks
+        slots = tracks.active_slots()
+        elapsed = max(1, self.frame_index - self.last_update_frame)
+        self.last_update_frame = self.frame_index
+
+        det_slots = np.full(len(class_ids), -1, dtype=np.int64)
+        unmatched_slots = slots
+
+        if len(slots) and len(class_ids):
+            track_idx, det_idx = self.assign(slots, centroids, class_ids, elapsed)
+            matched_slots = slots[track_idx]
+            self.correct(matched_slots, centroids[det_idx])
+            tracks.bbox[matched_slots] = boxes[det_idx]
+            tracks.disappeared[matched_slots] = 0
+            tracks.hits[matched_slots] += 1
+            det_slots[det_idx] = matched_slots
+            unmatched_slots = np.setdiff1d(slots, matched_slots, assume_unique=True)
+
+        # Tracks sin match: sumar los frames sin verlos y eliminar los perdidos
+        tracks.disappeared[unmatched_slots] += elapsed
+        lost = unmatched_slots[tracks.disappeared[unmatched_slots] > self.max_disappeared]
+        if len(lost):
+            tracks.remove(lost)
+
+        # Detecciones sin match: tracks nuevos con velocidad 0 y velocidad muy incierta
+        new = np.flatnonzero(det_slots < 0)
+        for det in new.tolist():
+            det_slots[det] = tracks.add(centroids[det], boxes[det], int(class_ids[det]),
+                                        covariance=self.initial_covariance)
+        return det_slots, det_slots[new]
+
+    def visible_slots(self):
+        """Tracks emparejados en la última detección"""
+        slots = self.tracks.active_slots()
+        return slots[self.tracks.disappeared[slots] == 0]
+
+    def clear(self):
+        self.tracks.clear()
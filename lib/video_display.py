@@ -0,0 +1,86 @@
+import time
+
+import cv2
+import numpy as np
+from PyQt5.QtCore import QTimer
+from PyQt5.QtGui import QImage, QPixmap
+
+
+class VideoDisplay:
+    """Etapa de visualización de video en un QLabel, separada del procesamiento.
+
+    submit() sólo guarda el último frame procesado; un QTimer lo dibuja
+    como mucho max_fps veces por segundo, sin importar a qué ritmo llegan
+    los frames. Para dibujar, el frame se reduce una sola vez al tamaño
+    del label (INTER_AREA) dentro de un buffer que se reutiliza y se
+    convierte de BGR a RGB sobre ese mismo buffer. Si el label no está
+    visible no se dibuja nada. Usar desde el hilo de la interfaz.
+    """
+
+    def __init__(self, label, max_fps=30):
+        self.label = label
+        self.enabled = True
+        self._pending = None
+        self._buffer = None  # RGB del tamaño de la imagen mostrada, reutilizado entre frames
+
+        self._timer = QTimer(label)
+        self._timer.setInterval(int(1000 / max_fps))
+        self._timer.timeout.connect(self._render)
+
+        # Métricas
+        self.frames_submitted = 0
+        self.frames_rendered = 0
+        self.last_render_ms = 0.0
+
+    def submit(self, frame):
+        """Guardar el frame más reciente (los anteriores sin dibujar se descartan)"""
+        self.frames_submitted += 1
+        if not self.enabled:
+            return
+        self._pending = frame
+        if not self._timer.isActive():
+            self._timer.start()
+
+    def _target_size(self, width, height):
+        """Tamaño que entra en el label conservando la proporción del frame"""
+        scale = min(self.label.width() / width, self.label.height() / height)
+        return max(1, int(width * scale)), max(1, int(height * scale))
+
+    def _render(self):
+        frame = self._pending
+        if frame is None:
+            self._timer.stop()  # Sin frames nuevos: no despertar la interfaz
+            return
+        self._pending = None
+        if not self.enabled or not self.label.isVisible():
+            return
+
+        start = time.perf_counter()
+        height, width = frame.shape[:2]
+        target_width, target_height = self._target_size(width, height)
+        if self._buffer is None or self._buffer.shape[:2] != (target_height, target_width):
+            self._buffer = np.empty((target_height, target_width, 3), dtype=np.uint8)
+
+        interpolation = cv2.INTER_AREA if target_width < width else cv2.INTER_LINEAR
+        cv2.resize(frame, (target_width, target_height), dst=self._buffer, interpolation=interpolation)
+        cv2.cvtColor(self._buffer, cv2.COLOR_BGR2RGB, dst=self._buffer)
+
+        image = QImage(self._buffer.data, target_width, target_height, 3 * target_width, QImage.Format_RGB888)
+        self.label.setPixmap(QPixmap.fromImage(image))  # fromImage copia: el buffer se puede reutilizar
+        self.frames_rendered += 1
+        self.last_render_ms = (time.perf_counter() - start) * 1000
+
+    def set_enabled(self, enabled):
+        """Activar o desactivar el dibujo (ej: al ocultar la pestaña)"""
+        self.enabled = enabled
+        if not enabled:
+            self._pending = None
+            self._timer.stop()
+
+    def clear(self):
+        """Descartar el frame pendiente (ej: al detener el video)"""
+        self._pending = None
+
+    def stats(self):
+        return {'submitted': self.frames_submitted, 'rendered': self.frames_rendered,
+                'render_ms': self.last_render_ms}
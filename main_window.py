@@ -0,0 +1,235 @@
+"""
+Smart Traffic - Ventana principal (barra de herramientas y widgets de cada función)
+"""
+import sys
+import traceback
+from PyQt5.QtWidgets import QMainWindow, QLabel, QToolBar, QAction, QVBoxLayout, QWidget, QActionGroup, QMessageBox
+from PyQt5.QtCore import Qt, QTimer
+from PyQt5.QtGui import QIcon, QPixmap
+
+# Importaciones locales con manejo de errores
+try:
+    from features.plate_detector.plate_detector_widget import PlateDetectorWidget
+    from lib.camera_capture import CameraCapture
+    from features.object_count.object_count_widget import ObjectCountWidget
+    from features.statistics.statistics_widget import StatisticsWidget
+    from lib.model_registry import registry
+
+    print("✅ Módulos cargados correctamente")
+except ImportError as e:
+    print(f"⚠️ Error importando módulos: {e}")
+    sys.exit(1)
+
+
+class MainWindow(QMainWindow):
+    def __init__(self, warmup_models=True):
+        super().__init__()
+        self.actionGroup = None
+        self.toolbar = None
+        self.central_widget = None
+        self.setWindowTitle("Smart Traffic")
+
+        # Los modelos se cargan bajo demanda desde el registro compartido;
+        # opcionalmente se precargan en segundo plano cuando la ventana ya es visible
+        self.warmup_models = warmup_models
+
+        # NO inicializar camera_capture automáticamente para evitar crash en macOS
+        # Se inicializará cuando el usuario seleccione una función que lo requiera
+        self.camera_capture = None
+        self.camera_label = QLabel()
+        self.splitter_right = None
+        
+        # Configurar tamaño de ventana
+        self.setMinimumSize(1280, 720)
+        self.setMaximumSize(1280, 720)
+        
+        # Inicializar acciones
+        self.start_action = None
+        self.detector_action = None
+        self.count_action = None
+        self.std_action = None
+        
+        # Inicializar UI
+        self.initUI()
+        
+        # Asegurar que la ventana se muestre
+        self.show()
+        self.raise_()
+        self.activateWindow()
+
+        if self.warmup_models:
+            QTimer.singleShot(0, self.start_model_warmup)
+
+    def start_model_warmup(self):
+        """Precargar modelos en un hilo de fondo sin bloquear la interfaz"""
+        try:
+            # El YOLO de placas se usa en los procesos del lector (PlateReaderPool), no en la interfaz
+            registry.warmup(exclude=('license_plate_yolo',))
+        except Exception as e:
+            print(f"Advertencia: No se pudo iniciar la precarga de modelos: {e}")
+
+    def initUI(self):
+        """Inicializa la interfaz de usuario"""
+        try:
+            self.toolbar = QToolBar()
+            self.toolbar.setToolButtonStyle(Qt.ToolButtonTextUnderIcon)
+            self.addToolBar(Qt.TopToolBarArea, self.toolbar)
+            self.actionGroup = QActionGroup(self)
+
+            # Crear acciones con verificación de iconos
+            self.start_action = self.create_action("assets/images/home.png", "Inicio")
+            self.detector_action = self.create_action("assets/images/camera.png", "Detección de Placas")
+            self.count_action = self.create_action("assets/images/conteo.png", "Conteo de Objetos")
+            self.std_action = self.create_action("assets/images/std.png", "Estadísticas")
+
+            # Agregar acciones al grupo
+            for action in [self.start_action, self.detector_action,
+                          self.count_action, self.std_action]:
+                if action:
+                    self.actionGroup.addAction(action)
+                    self.toolbar.addAction(action)
+
+            # Conectar acciones con manejo de errores
+            if self.start_action:
+                self.start_action.triggered.connect(self.safe_setInitialLayout)
+            if self.detector_action:
+                self.detector_action.triggered.connect(self.safe_setupPlateDetector)
+            if self.count_action:
+                self.count_action.triggered.connect(self.safe_setupCountLayout)
+            if self.std_action:
+                self.std_action.triggered.connect(self.safe_setupStdLayout)
+
+            self.setupInitialLayout()
+            
+        except Exception as e:
+            print(f"Error inicializando UI: {e}")
+            self.show_error(f"Error inicializando la interfaz: {e}")
+
+    def create_action(self, icon_path, text):
+        """Crea una acción con manejo de errores para el icono"""
+        try:
+            import os
+            if os.path.exists(icon_path):
+                action = QAction(QIcon(icon_path), text, self)
+            else:
+                print(f"Icono no encontrado: {icon_path}")
+                action = QAction(text, self)
+            action.setCheckable(True)
+            return action
+        except Exception as e:
+            print(f"Error creando acción {text}: {e}")
+            return None
+
+    def setupInitialLayout(self):
+        """Configura el layout inicial"""
+        try:
+            self.central_widget = QWidget()
+            self.setCentralWidget(self.central_widget)
+            layout = QVBoxLayout(self.central_widget)
+            layout.setContentsMargins(0, 0, 0, 0)
+
+            image_label = QLabel(self.central_widget)
+
+            import os
+            if os.path.exists("assets/images/fondo.png"):
+                pixmap = QPixmap("assets/images/fondo.png")
+                image_label.setPixmap(pixmap.scaled(self.size(), Qt.KeepAspectRatioByExpanding, Qt.SmoothTransformation))
+            else:
+                # Fondo con gradiente oscuro profesional
+                image_label.setText("SMART TRAFFIC\n\nSistema Inteligente de Monitoreo")
+                image_label.setStyleSheet("""
+                    QLabel {
+                        font-size: 32px;
+                        font-weight: bold;
+                        color: white;
+                        background: qlineargradient(x1:0, y1:0, x2:1, y2:1,
+                                                   stop:0 #1a1a2e,
+                                                   stop:0.5 #16213e,
+                                                   stop:1 #0f3460);
+                        padding: 50px;
+                    }
+                """)
+
+            image_label.setAlignment(Qt.AlignCenter)
+            layout.addWidget(image_label)
+        except Exception as e:
+            print(f"Error en setupInitialLayout: {e}")
+
+    # Métodos seguros con manejo de errores
+    def safe_setInitialLayout(self, checked):
+        if checked:
+            try:
+                self.clearLayout()
+                self.setupInitialLayout()
+            except Exception as e:
+                self.handle_error(e)
+
+    def safe_setupPlateDetector(self, checked):
+        if checked:
+            try:
+                self.clearLayout()
+                captureWidget = PlateDetectorWidget()
+                self.setCentralWidget(captureWidget)
+            except Exception as e:
+                self.handle_error(e)
+                self.setupInitialLayout()
+
+    def safe_setupCountLayout(self, checked):
+        if checked:
+            try:
+                self.clearLayout()
+                # Usar widget mejorado de conteo de objetos
+                objectCount = ObjectCountWidget()
+                self.setCentralWidget(objectCount)
+                print("✅ Widget de conteo de objetos cargado")
+            except Exception as e:
+                print(f"❌ Error cargando conteo: {e}")
+                self.handle_error(e)
+                self.setupInitialLayout()
+
+    def safe_setupStdLayout(self, checked):
+        if checked:
+            try:
+                self.clearLayout()
+                statistics = StatisticsWidget()
+                self.setCentralWidget(statistics)
+                print("✅ Widget de estadísticas cargado")
+            except Exception as e:
+                print(f"❌ Error cargando estadísticas: {e}")
+                self.handle_error(e)
+                self.setupInitialLayout()
+
+    def clearLayout(self):
+        """Limpia el layout actual"""
+        try:
+            if self.centralWidget():
+                # Detener hilos de captura/procesamiento del widget anterior
+                if hasattr(self.centralWidget(), 'shutdown'):
+                    self.centralWidget().shutdown()
+                self.centralWidget().deleteLater()
+        except Exception as e:
+            print(f"Error limpiando layout: {e}")
+
+    def handle_error(self, error):
+        """Maneja errores y muestra mensaje al usuario"""
+        print(f"Error: {error}")
+        traceback.print_exc()
+        self.show_error(f"Error: {error}")
+
+    def show_error(self, message):
+        """Muestra un mensaje de error al usuario"""
+        try:
+            QMessageBox.critical(self, "Error", message)
+        except:
+            print(f"Error crítico: {message}")
+
+    def closeEvent(self, event):
+        """Maneja el cierre de la aplicación"""
+        try:
+            if self.camera_capture:
+                self.camera_capture.stop_capture()
+            if hasattr(self.centralWidget(), 'shutdown'):
+                self.centralWidget().shutdown()
+        except:
+            pass
+        event.accept()
@@ -0,0 +1,563 @@
+#!/usr/bin/env python3
+"""
+Smart Traffic - Procesamiento por lotes sin interfaz gráfica
+
+Procesa archivos de video sin PyQt (sin QApplication ni QPixmap) y guarda
+conteos, placas y detecciones en JSON/CSV.
+
+Uso:
+    python run.py --mode count --input video.mp4
+    python run.py --mode plates --input video.mp4 --output resultados/
+    python run.py --mode count --input cam1.mp4 cam2.mp4 rtsp://camara3/stream
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import threading
+import traceback
+from collections import defaultdict
+from datetime import datetime, timedelta
+
+import cv2
+
+
+class StageTimer:
+    """Acumula tiempo por etapa de procesamiento (se puede medir desde varios hilos)"""
+
+    def __init__(self):
+        self.totals = defaultdict(float)
+        self.calls = defaultdict(int)
+        self._lock = threading.Lock()
+
+    def measure(self, stage, start):
+        """Registrar el tiempo transcurrido desde start para la etapa"""
+        elapsed = time.perf_counter() - start
+        with self._lock:
+            self.totals[stage] += elapsed
+            self.calls[stage] += 1
+
+    def report(self, frames, elapsed):
+        """Imprimir throughput y milisegundos promedio por etapa"""
+        fps = frames / elapsed if elapsed > 0 else 0.0
+        print(f"\n📊 Frames procesados: {frames} en {elapsed:.1f}s ({fps:.1f} frames/s)")
+        for stage, total in self.totals.items():
+            calls = self.calls[stage]
+            print(f"   {stage:<10} {total * 1000 / calls:8.2f} ms/llamada ({calls} llamadas)")
+
+    def as_dict(self):
+        return {stage: {'total_s': total, 'calls': self.calls[stage],
+                        'avg_ms': total * 1000 / self.calls[stage]}
+                for stage, total in self.totals.items()}
+
+
+def frame_time(capture, index, fps):
+    """Tiempo del frame en segundos (PTS del contenedor o índice / FPS)"""
+    msec = capture.get(cv2.CAP_PROP_POS_MSEC)
+    if msec and msec > 0:
+        return msec / 1000.0
+    return index / fps if fps > 0 else 0.0
+
+
+def read_frames(capture, fps, timer):
+    """Generador de (índice, tiempo, frame) midiendo el tiempo de decodificación"""
+    index = 0
+    while True:
+        start = time.perf_counter()
+        ok, frame = capture.read()
+        if not ok:
+            break
+        timer.measure('decode', start)
+        yield index, frame_time(capture, index, fps), frame
+        index += 1
+
+
+def read_batches(capture, fps, timer, batch_size):
+    """Agrupar frames decodificados en lotes de batch_size"""
+    batch = []
+    for item in read_frames(capture, fps, timer):
+        batch.append(item)
+        if len(batch) >= batch_size:
+            yield batch
+            batch = []
+    if batch:
+        yield batch
+
+
+class VideoSink:
+    """Video de salida anotado (opcional). Sin destino, no se dibuja nada"""
+
+    def __init__(self, path, fps):
+        self.path = path
+        self.fps = fps if fps > 0 else 30.0
+        self.writer = None
+
+    @property
+    def enabled(self):
+        return bool(self.path)
+
+    def write(self, frame):
+        if not self.enabled:
+            return
+        if self.writer is None:
+            height, width = frame.shape[:2]
+            fourcc = cv2.VideoWriter_fourcc(*'mp4v')
+            self.writer = cv2.VideoWriter(self.path, fourcc, self.fps, (width, height))
+        self.writer.write(frame)
+
+    def release(self):
+        if self.writer is not None:
+            self.writer.release()
+            self.writer = None
+
+
+def wall_time(args, video_time):
+    """Fecha/hora de un instante del video (grabación si se indicó --recorded-at, si no ahora)"""
+    if args.recorded_at:
+        return datetime.strptime(args.recorded_at, "%Y-%m-%d %H:%M:%S") + timedelta(seconds=video_time)
+    return datetime.now()
+
+
+def run_count(capture, fps, args, timer, sink):
+    """Conteo de objetos con ObjectCount"""
+    import uuid
+    from features.object_count.object_count import ObjectCount
+    from lib.database_manager import DetectionWriter
+
+    object_count = ObjectCount()
+    object_count.line_position = args.line_position
+    object_count.default_line_enabled = not args.no_default_line
+    object_count.annotator.enabled = sink.enabled
+    object_count.max_stride = max(1, args.stride)
+    if args.zones:
+        object_count.load_zones(args.zones)
+
+    writer = DetectionWriter(args.db) if args.db else None
+    if writer:
+        writer.start()
+    session_id = uuid.uuid4().hex
+    last_flush = 0.0
+
+    counts = []
+    detections = []
+    frames = 0
+    timestamp = 0.0
+
+    for index, timestamp, frame in read_frames(capture, fps, timer):
+        start = time.perf_counter()
+        object_count.process(frame)
+        timer.measure('count', start)
+        frames += 1
+
+        if sink.enabled:
+            start = time.perf_counter()
+            sink.write(object_count.annotate(frame))
+            timer.measure('render', start)
+
+        for event in object_count.new_counts:
+            if writer and event['first']:
+                writer.record_vehicle(event['class_name'], event['bbox'], source=args.input[0],
+                                      timestamp=wall_time(args, timestamp))
+            counts.append({
+                'frame': index,
+                'time_s': round(timestamp, 3),
+                'object_id': event['object_id'],
+                'class_name': event['class_name'],
+                'display_name': event['display_name'],
+                'line': event['line'],
+                'direction': event['direction'],
+            })
+
+        if writer and timestamp - last_flush >= args.zone_interval:
+            writer.record_zone_counts(object_count.flush_zone_counts(), session_id, wall_time(args, timestamp))
+            last_flush = timestamp
+
+        if args.detections:
+            detections.extend(count_detection_rows(object_count, index, timestamp))
+
+        if args.max_frames and frames >= args.max_frames:
+            break
+
+    if writer:
+        writer.record_zone_counts(object_count.flush_zone_counts(), session_id, wall_time(args, timestamp))
+        stop_writer(writer, timer)
+
+    # Por clase: cada objeto una vez; por línea: cada cruce
+    by_class = defaultdict(set)
+    by_line = defaultdict(int)
+    for event in counts:
+        by_class[event['class_name']].add(event['object_id'])
+        by_line[f"{event['line']}:{event['direction']}"] += 1
+
+    summary = {
+        'total': object_count.count_detection,
+        'by_class': {name: len(ids) for name, ids in by_class.items()},
+        'by_line': dict(by_line),
+        'zones': {zone.name: zone.entries for zone in object_count.zones},
+        'detected_frames': object_count.detected_frames,
+        'predicted_frames': object_count.predicted_frames,
+    }
+    return frames, summary, {'counts': counts, 'detections': detections}
+
+
+def run_plates(capture, fps, args, timer, sink):
+    """Detección y lectura de placas con Detector + Plate"""
+    from features.plate_detector.plate_stream import PlateStreamState
+    from lib.database_manager import DetectionWriter
+
+    writer = DetectionWriter(args.db) if args.db else None
+    if writer:
+        writer.start()
+    detector = create_plate_detector(args)
+    detector.annotator.enabled = sink.enabled
+    storage = start_storage(args)
+    state = PlateStreamState(args.cooldown_frames, storage)
+
+    plates = []
+    detections = []
+    frames = 0
+
+    for batch in read_batches(capture, fps, timer, args.batch_size * args.detectors):
+        start = time.perf_counter()
+        batch_detections = detector.detect_batch([frame for _, _, frame in batch], args.batch_size)
+        timer.measure('detect', start)
+
+        for (index, timestamp, frame), frame_detections in zip(batch, batch_detections):
+            frames += 1
+
+            if args.detections:
+                detections.extend(plate_detection_rows(detector, index, timestamp, frame_detections))
+
+            start = time.perf_counter()
+            for event in state.update(frame, frame_detections, detector):
+                plates.append({'frame': index, 'time_s': round(timestamp, 3), **event})
+                if event['new'] and writer:
+                    record_plate(writer, event, args.input[0], wall_time(args, timestamp))
+                if event['new']:
+                    print(f"✅ Placa detectada: {event['plate']} (frame {index})")
+            timer.measure('plate', start)
+
+            if sink.enabled:
+                start = time.perf_counter()
+                sink.write(detector.annotate(frame, frame_detections))
+                timer.measure('render', start)
+
+        if args.max_frames and frames >= args.max_frames:
+            break
+
+    if storage:
+        storage.stop()
+    if writer:
+        stop_writer(writer, timer)
+
+    summary = {'unique_plates': len(state.unique_plates), 'plates': sorted(state.unique_plates)}
+    return frames, summary, {'plates': plates, 'detections': detections}
+
+
+def create_plate_detector(args):
+    """Detector de placas; con --detectors N, un pool de N intérpretes que infieren en paralelo"""
+    from features.plate_detector.detector import Detector, DetectorPool
+
+    options = {'max_batch_size': args.batch_size, 'num_threads': args.threads, 'use_xnnpack': not args.no_xnnpack}
+    if args.detectors > 1:
+        return DetectorPool(size=args.detectors, **options)
+    return Detector(**options)
+
+
+def record_plate(writer, event, source, timestamp):
+    """Registrar una placa leída (evento de PlateStreamState)"""
+    writer.record_plate(event['plate'], event['confidence'], (event['x1'], event['y1'], event['x2'], event['y2']),
+                        source=source, timestamp=timestamp, image_path=event.get('image_path'))
+
+
+def start_storage(args):
+    """Guardado de recortes de placas nuevas en --captures (None si no se pidió)"""
+    from lib.capture_storage import CaptureStorage
+
+    if not args.captures:
+        return None
+    storage = CaptureStorage(args.captures, jpeg_quality=args.jpeg_quality)
+    storage.start()
+    return storage
+
+
+def stop_writer(writer, timer):
+    """Esperar a que el escritor guarde lo pendiente e informar"""
+    start = time.perf_counter()
+    writer.stop()
+    timer.measure('database', start)
+    stats = writer.stats()
+    print(f"💾 Base de datos: {stats['written']} filas guardadas, {stats['dropped']} descartadas")
+
+
+def count_detection_rows(object_count, index, timestamp):
+    """Filas de los objetos seguidos visibles en un frame"""
+    tracks = object_count.tracks
+    slots = object_count.tracker.visible_slots()
+    rows = []
+    for object_id, class_id, (x1, y1, x2, y2) in zip(
+            tracks.object_id[slots].tolist(), tracks.class_id[slots].tolist(), tracks.bbox[slots].tolist()):
+        rows.append({
+            'frame': index,
+            'time_s': round(timestamp, 3),
+            'object_id': object_id,
+            'class_name': object_count.class_name(class_id),
+            'x1': x1, 'y1': y1, 'x2': x2, 'y2': y2,
+        })
+    return rows
+
+
+def plate_detection_rows(detector, index, timestamp, frame_detections):
+    """Filas de detecciones de placas de un frame"""
+    rows = []
+    for (ymin, xmin, ymax, xmax), class_id, score in zip(
+            frame_detections['box'].tolist(), frame_detections['class_id'].tolist(),
+            frame_detections['score'].tolist()):
+        rows.append({
+            'frame': index,
+            'time_s': round(timestamp, 3),
+            'class_name': detector.label(class_id),
+            'score': round(score, 4),
+            'x1': int(xmin), 'y1': int(ymin), 'x2': int(xmax), 'y2': int(ymax),
+        })
+    return rows
+
+
+def run_streams(args, timer):
+    """Varias fuentes a la vez con StreamEngine: un modelo, estado por stream"""
+    from lib.stream_engine import StreamEngine
+    from lib.database_manager import DetectionWriter
+
+    if args.mode == 'count':
+        from features.object_count.object_count import CountPipeline
+        pipeline = CountPipeline(args.line_position, not args.no_default_line, args.zones, args.stride)
+    else:
+        from features.plate_detector.plate_stream import PlatePipeline
+        storage = start_storage(args)
+        pipeline = PlatePipeline(args.cooldown_frames, create_plate_detector(args), storage)
+
+    tables = {'counts': [], 'detections': []} if args.mode == 'count' else {'plates': [], 'detections': []}
+    frames = defaultdict(int)
+
+    writer = DetectionWriter(args.db) if args.db else None
+    if writer:
+        writer.start()
+
+    def on_result(source, index, timestamp, frame, detections, events):
+        frames[source] += 1
+        for event in events:
+            row = {'source': source, 'frame': index, 'time_s': round(timestamp, 3)}
+            if args.mode == 'count':
+                x1, y1, x2, y2 = event['bbox']
+                row.update(object_id=event['object_id'], class_name=event['class_name'],
+                           line=event['line'], direction=event['direction'], x1=x1, y1=y1, x2=x2, y2=y2)
+                tables['counts'].append(row)
+                if writer and event['first']:
+                    writer.record_vehicle(event['class_name'], event['bbox'], source=source,
+                                          timestamp=wall_time(args, timestamp))
+            else:
+                row.update(event)
+                tables['plates'].append(row)
+                if writer and event['new']:
+                    record_plate(writer, event, source, wall_time(args, timestamp))
+        if args.detections:
+            if args.mode == 'count':
+                rows = count_detection_rows(states[source], index, timestamp)
+            else:
+                rows = plate_detection_rows(pipeline.detector, index, timestamp, detections)
+            tables['detections'].extend({'source': source, **row} for row in rows)
+        if args.max_frames and sum(frames.values()) >= args.max_frames:
+            engine.stop()
+
+    batch_size = args.batch_size * args.detectors if args.mode == 'plates' else args.batch_size
+    engine = StreamEngine(args.input, pipeline, batch_size=batch_size, scheduling=args.scheduling,
+                          realtime=args.realtime or None, on_result=on_result,
+                          timer=timer, step_stage='count' if args.mode == 'count' else 'plate')
+    states = dict(zip((stream.name for stream in engine.streams), engine.states))
+    try:
+        engine.run()
+    finally:
+        if args.mode == 'plates' and pipeline.storage:
+            pipeline.storage.stop()
+        if writer:
+            stop_writer(writer, timer)
+
+    summary = {'batches': engine.batches, 'streams': {}}
+    for stream, state in zip(engine.streams, engine.states):
+        stats = stream.stats()
+        if args.mode == 'count':
+            stats['total'] = state.count_detection
+            stats['detected_frames'] = state.detected_frames
+            stats['predicted_frames'] = state.predicted_frames
+            stats['zones'] = {zone.name: zone.entries for zone in state.zones}
+        else:
+            stats['plates'] = sorted(state.unique_plates)
+        summary['streams'][stream.name] = stats
+    return sum(frames.values()), summary, tables
+
+
+def report_models():
+    """Imprimir tiempo de carga y memoria de los modelos del registro"""
+    from lib.model_registry import registry
+
+    for name, stats in registry.stats().items():
+        memory = f", {stats['rss_mb']:.0f} MB" if stats['rss_mb'] is not None else ""
+        print(f"   modelo {name}: {stats['load_s']:.1f}s{memory}")
+
+
+def write_csv(path, rows):
+    """Escribir lista de diccionarios como CSV"""
+    if not rows:
+        return
+    with open(path, 'w', newline='', encoding='utf-8') as file:
+        writer = csv.DictWriter(file, fieldnames=list(rows[0].keys()))
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def write_results(args, summary, tables, timer, frames, elapsed):
+    """Guardar resultados en el directorio de salida"""
+    os.makedirs(args.output, exist_ok=True)
+    if len(args.input) == 1:
+        base_name = os.path.splitext(os.path.basename(args.input[0]))[0]
+    else:
+        base_name = 'streams'
+    prefix = os.path.join(args.output, f"{base_name}_{args.mode}")
+
+    if args.format in ('json', 'both'):
+        report = {
+            'input': args.input,
+            'mode': args.mode,
+            'frames': frames,
+            'elapsed_s': round(elapsed, 3),
+            'fps': round(frames / elapsed, 2) if elapsed > 0 else 0.0,
+            'stages': timer.as_dict(),
+            'summary': summary,
+        }
+        report.update(tables)
+        with open(f"{prefix}.json", 'w', encoding='utf-8') as file:
+            json.dump(report, file, ensure_ascii=False, indent=2)
+
+    if args.format in ('csv', 'both'):
+        for name, rows in tables.items():
+            write_csv(f"{prefix}_{name}.csv", rows)
+
+    print(f"💾 Resultados guardados en: {args.output}")
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(description="Smart Traffic - procesamiento de video sin interfaz")
+    parser.add_argument('--mode', choices=['count', 'plates'], required=True,
+                        help="count: conteo de objetos | plates: detección de placas")
+    parser.add_argument('--input', required=True, nargs='+',
+                        help="Video(s) o URL(s) a procesar; con varias fuentes se procesan juntas")
+    parser.add_argument('--output', default='output', help="Directorio de resultados (por defecto: output)")
+    parser.add_argument('--format', choices=['json', 'csv', 'both'], default='both',
+                        help="Formato de salida (por defecto: both)")
+    parser.add_argument('--detections', action='store_true',
+                        help="Guardar también las detecciones por frame")
+    parser.add_argument('--video-out', default=None,
+                        help="Guardar video anotado en esta ruta (una sola fuente; sin esta opción no se dibuja)")
+    parser.add_argument('--max-frames', type=int, default=0,
+                        help="Procesar como máximo N frames (0 = todos)")
+    parser.add_argument('--line-position', type=float, default=0.55,
+                        help="Posición de la línea de conteo (0.0-1.0, modo count)")
+    parser.add_argument('--stride', type=int, default=1,
+                        help="Detectar como máximo cada N frames con tráfico ralo; entre detecciones se prevé el movimiento (modo count, 1 = todos)")
+    parser.add_argument('--zones', default=None,
+                        help="JSON con líneas y zonas de conteo adicionales (modo count)")
+    parser.add_argument('--no-default-line', action='store_true',
+                        help="No usar la línea horizontal por defecto (modo count)")
+    parser.add_argument('--db', default=None,
+                        help="Guardar vehículos contados, placas y conteos por zona en esta base SQLite (ej: assets/smart_traffic.db)")
+    parser.add_argument('--zone-interval', type=float, default=60.0,
+                        help="Segundos de video entre registros en zone_counts (modo count)")
+    parser.add_argument('--recorded-at', default=None,
+                        help="Fecha/hora de inicio de la grabación 'AAAA-MM-DD HH:MM:SS' para los registros")
+    parser.add_argument('--batch-size', type=int, default=8,
+                        help="Frames por inferencia del detector de placas (1 = sin batch, modo plates)")
+    parser.add_argument('--threads', type=int, default=None,
+                        help="Hilos de cada intérprete TFLite (modo plates, por defecto: TFLite decide o, con --detectors, los núcleos repartidos)")
+    parser.add_argument('--detectors', type=int, default=1,
+                        help="Intérpretes TFLite en paralelo; cada lote se reparte entre ellos (modo plates)")
+    parser.add_argument('--no-xnnpack', action='store_true',
+                        help="Desactivar el delegado XNNPACK de TFLite (modo plates)")
+    parser.add_argument('--cooldown-frames', type=int, default=60,
+                        help="Frames de espera entre lecturas de placa (modo plates)")
+    parser.add_argument('--captures', default=None,
+                        help="Guardar los recortes de placas nuevas en esta carpeta (modo plates, ej: assets/images/capture)")
+    parser.add_argument('--jpeg-quality', type=int, default=85,
+                        help="Calidad JPEG de las capturas (0-100)")
+    parser.add_argument('--scheduling', choices=['round_robin', 'deadline'], default='round_robin',
+                        help="Orden de atención entre fuentes (varias fuentes)")
+    parser.add_argument('--realtime', action='store_true',
+                        help="Descartar frames atrasados en lugar de esperar (por defecto sólo con URLs)")
+    args = parser.parse_args(argv)
+    if args.detectors < 1:
+        parser.error("--detectors debe ser al menos 1")
+    if len(args.input) > 1 and args.video_out:
+        parser.error("--video-out sólo admite una fuente de entrada")
+    return args
+
+
+def main(argv=None):
+    """Función principal"""
+    args = parse_args(argv)
+    timer = StageTimer()
+
+    if len(args.input) > 1:
+        print(f"▶ Procesando {len(args.input)} fuentes (modo: {args.mode}, {args.scheduling})")
+        start = time.perf_counter()
+        try:
+            frames, summary, tables = run_streams(args, timer)
+        except Exception as e:
+            print(f"❌ Error procesando fuentes: {e}")
+            traceback.print_exc()
+            return 1
+        elapsed = time.perf_counter() - start
+
+        timer.report(frames, elapsed)
+        report_models()
+        write_results(args, summary, tables, timer, frames, elapsed)
+        return 0
+
+    from lib.stream_engine import is_live_source
+
+    path = args.input[0]
+    # Las URLs (rtsp://, http://) y las cámaras locales no son archivos
+    if not is_live_source(path) and not os.path.exists(path):
+        print(f"❌ Archivo no encontrado: {path}")
+        return 1
+
+    capture = cv2.VideoCapture(int(path) if path.isdigit() else path)
+    if not capture.isOpened():
+        print(f"❌ No se pudo abrir el video: {path}")
+        return 1
+
+    fps = capture.get(cv2.CAP_PROP_FPS) or 0.0
+    runner = run_count if args.mode == 'count' else run_plates
+
+    print(f"▶ Procesando {path} (modo: {args.mode})")
+    sink = VideoSink(args.video_out, fps)
+    start = time.perf_counter()
+    try:
+        frames, summary, tables = runner(capture, fps, args, timer, sink)
+    except Exception as e:
+        print(f"❌ Error procesando video: {e}")
+        traceback.print_exc()
+        return 1
+    finally:
+        capture.release()
+        sink.release()
+    elapsed = time.perf_counter() - start
+
+    timer.report(frames, elapsed)
+    report_models()
+    write_results(args, summary, tables, timer, frames, elapsed)
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,74 @@
+import re
+
+from features.plate_detector.plate_cache import PlateCache, vote_plate
+
+
+def valid(text):
+    return bool(text) and re.fullmatch(r'[A-Z]{3}-\d{4}', text) is not None
+
+
+def read_until_decided(cache, track_id, texts):
+    """Pedir y agregar lecturas en orden; devuelve (placa decidida, lecturas hechas)"""
+    for done, text in enumerate(texts, start=1):
+        if not cache.request_read(track_id, now=0.0):
+            return cache.plate(track_id), done - 1
+        plate = cache.add_read(track_id, text, 0.9)
+        if plate is not None:
+            return plate, done
+    return None, len(texts)
+
+
+def test_vote_plate_per_character():
+    reads = [('ABC-1234', 0.9), ('ABG-1234', 0.6), ('ABC-1284', 0.5)]
+    assert vote_plate(reads) == 'ABC-1234'
+
+
+def test_vote_plate_uses_heaviest_length():
+    reads = [('ABC-123', 0.4), ('ABC-1234', 0.8), ('ABD-1234', 0.7)]
+    assert vote_plate(reads) == 'ABC-1234'
+    assert vote_plate([]) is None
+
+
+def test_cache_fixes_plate_after_agreeing_reads():
+    cache = PlateCache(min_agreeing=3, max_reads=8, validate=valid)
+    plate, reads = read_until_decided(cache, 1, ['ABC-1234', 'ABC-1284', 'ABC-1234', 'ABC-1234'] + ['XYZ-0000'] * 4)
+
+    assert plate == 'ABC-1234'
+    assert reads == 4
+    assert not cache.request_read(1, now=0.0)
+
+
+def test_cache_one_read_in_flight_per_vehicle():
+    cache = PlateCache()
+    assert cache.request_read(1, now=0.0)
+    assert not cache.request_read(1, now=0.0)
+    cache.cancel_read(1)
+    assert cache.request_read(1, now=0.0)
+
+
+def test_failed_reads_count_toward_max_reads():
+    cache = PlateCache(min_agreeing=3, max_reads=4, validate=valid)
+    plate, reads = read_until_decided(cache, 1, [None, '', None, None, 'ABC-1234', 'ABC-1234'])
+
+    assert plate is None
+    assert reads == 4
+    assert not cache.request_read(1, now=0.0)
+    assert cache.stats()['reads'] == 4
+
+
+def test_exhausted_reads_keep_valid_vote():
+    cache = PlateCache(min_agreeing=3, max_reads=3, validate=valid)
+    plate, reads = read_until_decided(cache, 1, ['ABC-1234', None, None])
+
+    assert plate == 'ABC-1234'
+    assert reads == 3
+
+
+def test_expired_vehicles_are_forgotten():
+    cache = PlateCache(ttl=5.0, max_reads=1, validate=valid)
+    cache.request_read(1, now=0.0)
+    cache.add_read(1, None, 0.0)
+    assert not cache.request_read(1, now=1.0)
+
+    cache.touch([], now=10.0)
+    assert cache.request_read(1, now=10.0)
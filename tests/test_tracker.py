@@ -0,0 +1,53 @@
+import numpy as np
+import pytest
+
+from lib.tracker import KalmanTracker
+from features.object_count.zones import line_crossings
+
+LINE_P1 = np.array([[0, 500]], dtype=np.float32)
+LINE_P2 = np.array([[640, 500]], dtype=np.float32)
+
+
+def run_vehicle(speed, stride=1, frames=60, start=(320.0, 40.0)):
+    """Un vehículo bajando a speed px/frame, detectado cada stride frames como en ObjectCount.
+
+    Devuelve (ids distintos, objetos contados al cruzar la línea y = 500).
+    """
+    tracker = KalmanTracker()
+    tracks = tracker.tracks
+    ids = set()
+    counted = set()
+    x, y = start
+    for frame in range(frames):
+        tracker.predict()
+        if frame % stride == 0:
+            centroids = np.array([[x, y]], dtype=np.float32)
+            boxes = np.array([[x - 20, y - 20, x + 20, y + 20]], dtype=np.int32)
+            det_slots, _ = tracker.update(centroids, boxes, np.array([2]))
+            ids.update(tracks.object_id[det_slots].tolist())
+
+        slots = tracks.active_slots()
+        crossed = line_crossings(tracks.prev_centroid[slots], tracks.centroid[slots], LINE_P1, LINE_P2)
+        counted.update(tracks.object_id[slots[np.any(crossed != 0, axis=1)]].tolist())
+        y += speed
+    return ids, counted
+
+
+@pytest.mark.parametrize('speed', [5, 15, 30, 40])
+@pytest.mark.parametrize('stride', [2, 3])
+def test_stride_counts_match_every_frame_detection(speed, stride):
+    frames = int(700 / speed)
+    ids_every_frame, counted_every_frame = run_vehicle(speed, 1, frames)
+    ids_strided, counted_strided = run_vehicle(speed, stride, frames)
+
+    assert len(ids_every_frame) == 1
+    assert len(ids_strided) == 1
+    assert len(counted_strided) == len(counted_every_frame) == 1
+
+
+@pytest.mark.parametrize('speed', [60, 85])
+def test_fast_vehicle_keeps_single_id(speed):
+    ids, counted = run_vehicle(speed, 1, frames=int(900 / speed), start=(320.0, 0.0))
+
+    assert len(ids) == 1
+    assert len(counted) == 1